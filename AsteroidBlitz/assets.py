@@ -0,0 +1,205 @@
+import hashlib
+import io
+import os
+import struct
+import threading
+
+import pygame
+
+from bundle import AssetBundle
+
+# Asset names like "layers/stars.png" are relative to the game's directory,
+# not the current working directory
+ASSET_ROOT = os.path.dirname(os.path.abspath(__file__))
+ATLAS_WIDTH = 512
+ATLAS_MAX_SPRITE = 64  # Only sprites this small (both sides) go into the atlas
+CACHE_HEADER = struct.Struct("<4sII")  # magic, width, height; RGBA pixels follow
+CACHE_MAGIC = b"ABI1"
+
+
+# Central asset cache. Images are loaded, converted, scaled and masked once and
+# the same Surface/Mask objects are shared by every sprite that asks for them.
+# Procedurally drawn surfaces go through the same cache via surface().
+#
+# Images can be decoded ahead of time on a background thread with prefetch()
+# (while the start menu is up, say); image() then only converts the result to
+# the display format, which has to happen on the main thread. With cache_dir
+# set, decoded and scaled pixels are also kept on disk, so later launches skip
+# PNG decoding and scaling.
+#
+# Files are looked up in an open AssetBundle first (see bundle.py) and under
+# `root` otherwise.
+class AssetManager:
+    def __init__(self, cache_dir=None, root=ASSET_ROOT):
+        self.root = root
+        self.bundle = None
+        self.surfaces = {}
+        self.masks = {}
+        self.atlas = None
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir = cache_dir
+        self.decoded = {}
+        self.prefetching = set()
+        self.prefetcher = None
+
+    def surface(self, key, factory, *args):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            surface = self.surfaces[key] = factory(*args)
+        else:
+            self.hits += 1
+        return surface
+
+    def open_bundle(self, path):
+        self.bundle = AssetBundle(path)
+        return self.bundle
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    # Something mixer.music.load() accepts: the file's path, or its bytes
+    # when it comes from the bundle
+    def music(self, name):
+        if self.bundle is not None and name in self.bundle:
+            return io.BytesIO(self.bundle.data(name))
+        return self.path(name)
+
+    def image(self, key, path, size=None, alpha=True):
+        return self.surface(key, self.load_image, key, path, size, alpha)
+
+    def load_image(self, key, path, size, alpha):
+        if key in self.prefetching:
+            self.prefetcher.join()  # Usually long finished
+        image = self.decoded.pop(key, None)
+        if image is None:
+            image = self.decode(path, size)
+        return image.convert_alpha() if alpha else image.convert()
+
+    # Load and scale an image, not yet converted to the display format. Safe
+    # to call off the main thread.
+    def decode(self, name, size=None):
+        if self.bundle is not None and name in self.bundle:
+            # Already decoded pixels; only scaling is left to do
+            image = self.bundle.image(name)
+            return pygame.transform.scale(image, size) if size is not None else image
+        return decode_image(self.path(name), size, self.cache_dir)
+
+    # Decode (key, path, size) requests on a background thread
+    def prefetch(self, requests):
+        requests = [request for request in requests if request[0] not in self.surfaces]
+        self.prefetching = {key for key, _, _ in requests}
+
+        def decode_all():
+            for key, path, size in requests:
+                self.decoded[key] = self.decode(path, size)
+
+        self.prefetcher = threading.Thread(target=decode_all, name="asset-prefetch", daemon=True)
+        self.prefetcher.start()
+        return self.prefetcher
+
+    def mask(self, key):
+        mask = self.masks.get(key)
+        if mask is None:
+            self.misses += 1
+            mask = self.masks[key] = pygame.mask.from_surface(self.surfaces[key])
+        else:
+            self.hits += 1
+        return mask
+
+    def build_atlas(self):
+        # Shelf-pack every small cached surface into one texture and swap the
+        # cache entries for subsurfaces of it. Sprites created afterwards share
+        # the atlas pixels; existing masks stay valid since pixels are unchanged.
+        small = [key for key, surface in self.surfaces.items()
+                 if surface.get_parent() is None
+                 and surface.get_width() <= ATLAS_MAX_SPRITE
+                 and surface.get_height() <= ATLAS_MAX_SPRITE]
+        if not small:
+            return None
+        small.sort(key=lambda key: self.surfaces[key].get_height(), reverse=True)
+
+        placements = []
+        x = y = shelf_height = 0
+        for key in small:
+            width, height = self.surfaces[key].get_size()
+            if x + width > ATLAS_WIDTH:
+                x = 0
+                y += shelf_height
+                shelf_height = 0
+            placements.append((key, pygame.Rect(x, y, width, height)))
+            x += width
+            shelf_height = max(shelf_height, height)
+
+        atlas = pygame.Surface((ATLAS_WIDTH, y + shelf_height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        atlas.fill((0, 0, 0, 0))
+        for key, rect in placements:
+            atlas.blit(self.surfaces[key], rect)
+        for key, rect in placements:
+            self.surfaces[key] = atlas.subsurface(rect)
+        self.atlas = atlas
+        return atlas
+
+    def memory(self):
+        total = 0
+        for surface in self.surfaces.values():
+            if surface.get_parent() is None:
+                total += surface_bytes(surface)
+        if self.atlas is not None:
+            total += surface_bytes(self.atlas)
+        for mask in self.masks.values():
+            width, height = mask.get_size()
+            total += (width * height + 7) // 8
+        return total
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "surfaces": len(self.surfaces),
+            "masks": len(self.masks),
+            "atlas_size": self.atlas.get_size() if self.atlas is not None else None,
+            "bytes": self.memory(),
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"Assets: {stats['surfaces']} surfaces, {stats['masks']} masks, "
+                f"{stats['bytes'] / 1024:.1f} KiB, {stats['hits']} hits / {stats['misses']} misses")
+
+
+# Load and scale an image file, going through the on-disk cache if there is one
+def decode_image(path, size=None, cache_dir=None):
+    cache_path = cached_image_path(cache_dir, path, size) if cache_dir else None
+    if cache_path is not None and os.path.exists(cache_path):
+        with open(cache_path, "rb") as source:
+            data = source.read()
+        magic, width, height = CACHE_HEADER.unpack_from(data)
+        if magic == CACHE_MAGIC and len(data) == CACHE_HEADER.size + width * height * 4:
+            return pygame.image.frombytes(data[CACHE_HEADER.size:], (width, height), "RGBA")
+    image = pygame.image.load(path)
+    if size is not None:
+        image = pygame.transform.scale(image, size)
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f"{cache_path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as out:
+            out.write(CACHE_HEADER.pack(CACHE_MAGIC, *image.get_size()))
+            out.write(pygame.image.tobytes(image, "RGBA"))
+        os.replace(temporary, cache_path)
+    return image
+
+
+# Cache entries are named after the source file's path, size and mtime and
+# the target size, so editing an image or its scale misses the old entry
+def cached_image_path(cache_dir, path, size):
+    stat = os.stat(path)
+    name = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{size}"
+    return os.path.join(cache_dir, hashlib.sha1(name.encode()).hexdigest() + ".img")
+
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
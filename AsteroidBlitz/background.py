@@ -0,0 +1,89 @@
+import pygame
+
+
+# Scrolling parallax background. Layers that scroll at the same speed and
+# wrap at the same width are flattened into one band when the background is
+# built, so the per-frame cost is one blit per distinct speed rather than two
+# per layer:
+#
+# - the bottom band is opaque, so it is converted to the display format
+#   without alpha and pre-tiled into a strip one screen wider than its wrap
+#   width; a single area blit covers the whole screen and no clear is needed.
+# - bands above it keep alpha but are cropped to their bounding rect, so the
+#   empty parts of the planet and star layers are never blended.
+class Band:
+    def __init__(self, image, speed):
+        self.speed = speed
+        self.width = image.get_width()
+        self.height = image.get_height()
+        self.images = [image]
+        self.x = 0
+        self.surface = None
+        self.offset = (0, 0)
+        self.opaque = False
+
+    def bake(self, screen_size, opaque):
+        flattened = self.images[0]
+        if len(self.images) > 1:
+            flattened = flattened.copy()
+            for image in self.images[1:]:
+                flattened.blit(image, (0, 0))
+        self.opaque = opaque and flattened.get_width() >= screen_size[0] and flattened.get_height() >= screen_size[1]
+        if self.opaque:
+            # Strip holding the layer followed by its own start, so any
+            # screen-wide window into it is one contiguous area
+            self.surface = pygame.Surface((self.width + screen_size[0], self.height)).convert()
+            self.surface.blit(flattened, (0, 0))
+            self.surface.blit(flattened, (self.width, 0), (0, 0, screen_size[0], self.height))
+            self.offset = (0, 0)
+        else:
+            bounds = flattened.get_bounding_rect()
+            self.surface = flattened.subsurface(bounds).copy()
+            self.offset = bounds.topleft
+
+    def scroll(self, frames=1):
+        self.x -= self.speed * frames
+        if self.x <= -self.width:
+            self.x %= -self.width
+
+    def draw(self, target):
+        if self.opaque:
+            target.blit(self.surface, (0, 0), (-int(self.x), 0, target.get_width(), self.height))
+            return
+        # Tile the cropped layer across the screen
+        left, top = self.offset
+        x = self.x
+        while x < target.get_width():
+            target.blit(self.surface, (x + left, top))
+            x += self.width
+
+
+class ParallaxBackground:
+    def __init__(self, screen_size):
+        self.screen_size = screen_size
+        self.bands = []
+
+    # Layers are added bottom first; the first one should cover the screen
+    def add_layer(self, image, speed):
+        top = self.bands[-1] if self.bands else None
+        if top is not None and top.speed == speed and top.width == image.get_width():
+            top.images.append(image)
+        else:
+            self.bands.append(Band(image, speed))
+        return self
+
+    def build(self):
+        for index, band in enumerate(self.bands):
+            band.bake(self.screen_size, opaque=index == 0)
+        return self
+
+    def scroll(self, frames=1):
+        for band in self.bands:
+            band.scroll(frames)
+
+    # Draws the bottom `layers` bands, or all of them
+    def draw(self, target, layers=None):
+        if not self.bands or not self.bands[0].opaque:
+            target.fill((0, 0, 0))
+        for band in self.bands[:layers]:
+            band.draw(target)
@@ -0,0 +1,198 @@
+# Frame-time benchmark suite. Drives a headless ModernGame through named,
+# seeded stress scenarios and reports p50/p95/p99 update and draw cost, split
+# into subsystems. Results are written as JSON so runs can be diffed between
+# commits.
+#
+#     python bench.py                       # every scenario
+#     python bench.py "projectile storm" --ticks 300 --out before.json
+#     python bench.py --state late.abs      # every scenario from a save state
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+import pygame
+
+import headless
+import main
+import savestate
+from profiler import percentiles
+
+# Subsystem -> profiler sections it is made of
+SUBSYSTEMS = {
+    "particles": ("update_particles", "draw_particles"),
+    "collisions": ("collisions",),
+    "sprite_updates": ("update_sprites",),
+    "sprite_draw": ("draw_sprites",),
+    "background": ("draw_background",),
+    "hud": ("draw_hud",),
+}
+
+
+# Scenarios run for a fixed number of ticks, so the player never dies
+def keep_player_alive(game):
+    game.player.health = 100
+    game.player.shield = 100
+    game.game_over = False
+
+
+def add_asteroids(game, count):
+    for _ in range(count):
+        asteroid = game.asteroid_pool.acquire(game.rng.randint(30, 60), game.rng)
+        asteroid.position = pygame.math.Vector2(game.rng.uniform(0, main.WIDTH), game.rng.uniform(0, main.HEIGHT))
+        game.all_sprites.add(asteroid)
+        game.asteroids.add(asteroid)
+
+
+def add_enemies(game, count):
+    for _ in range(count):
+        game.spawn_enemy()
+
+
+def thousand_asteroids_tick(game):
+    keep_player_alive(game)
+    if len(game.asteroids) < 1000:
+        add_asteroids(game, 1000 - len(game.asteroids))
+
+
+def projectile_storm_script(tick):
+    presses = [pygame.K_SPACE]
+    if tick % 3 == 0:
+        presses.append(pygame.K_q)
+    held = (pygame.K_LEFT,) if (tick // 60) % 2 else (pygame.K_RIGHT,)
+    return held, presses
+
+
+def projectile_storm_tick(game):
+    keep_player_alive(game)
+    game.player.ammunition = 100
+    game.player.shotgun_ammo = 6
+
+
+def explosion_chain_tick(game):
+    keep_player_alive(game)
+    for _ in range(10):
+        game.create_explosion(game.rng.uniform(0, main.WIDTH), game.rng.uniform(0, main.HEIGHT),
+                              game.rng.choice([main.NEON_GREEN, main.NEON_PINK, main.NEON_BLUE]))
+
+
+def enemy_swarm_setup(game):
+    game.level = 20
+    game.enemy_spawn_delay = 10
+    add_enemies(game, 40)
+
+
+# name -> (setup, per-tick hook, input script)
+SCENARIOS = {
+    "1000 asteroids": (None, thousand_asteroids_tick, None),
+    "projectile storm": (None, projectile_storm_tick, projectile_storm_script),
+    "explosion chain": (None, explosion_chain_tick, None),
+    "level 20 enemy swarm": (enemy_swarm_setup, keep_player_alive, headless.fire),
+}
+
+
+# `state` is a snapshot to start from instead of a new game, e.g. a late
+# level saved with `headless.py --save-state`
+def run_scenario(name, ticks=600, warmup=60, seed=0, state=None):
+    setup, per_tick, script = SCENARIOS[name]
+    game = headless.new_game(seed, script)
+    if state is not None:
+        game.restore(state)
+    if setup is not None:
+        setup(game)
+    profiler = main.profiler
+    profiler.clear()
+    profiler.enabled = True
+    try:
+        for tick in range(warmup + ticks):
+            if tick == warmup:
+                profiler.clear()
+            if per_tick is not None:
+                per_tick(game)
+            profiler.begin_frame()
+            game.step()
+            with profiler.section("draw"):
+                game.draw()
+            profiler.end_frame()
+    finally:
+        profiler.enabled = False
+    frames = list(profiler.frames)
+
+    def section_times(*sections):
+        return [sum(frame.get(section, 0.0) for section in sections) for frame in frames]
+
+    return {
+        "seed": seed,
+        "ticks": len(frames),
+        "update": percentiles(section_times("handle_events", "update")),
+        "draw": percentiles(section_times("draw")),
+        "subsystems": {subsystem: percentiles(section_times(*sections))
+                       for subsystem, sections in SUBSYSTEMS.items()},
+        "entities": {
+            "asteroids": len(game.asteroids),
+            "projectiles": len(game.projectiles),
+            "enemies": len(game.enemies),
+            "particles": main.particle_system.count(),
+            "scheduled events": game.scheduler.depth(),
+        },
+        "hud redraws": game.hud_left.redraws + game.hud_right.redraws,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(names, ticks, warmup, seed, state_path=None):
+    state = savestate.load(state_path) if state_path else None
+    results = {
+        "meta": {
+            "state": state_path,
+            "commit": git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        result = run_scenario(name, ticks, warmup, seed, state)
+        results["scenarios"][name] = result
+        print(f"{name:<22} update p50 {result['update']['p50']:7.2f} ms  p99 {result['update']['p99']:7.2f} ms   "
+              f"draw p50 {result['draw']['p50']:7.2f} ms  p99 {result['draw']['p99']:7.2f} ms")
+    # Shared caches, totalled over every scenario run
+    results["caches"] = {
+        "rotation": main.rotation_cache.stats(),
+        "text": main.text_cache.stats(),
+    }
+    results["sounds"] = main.sounds.stats()  # Plays, and those the channel budgets dropped or cut off
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Modern Asteroid Blitz frame-time benchmarks")
+    parser.add_argument("scenarios", nargs="*", help=f"any of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--state", metavar="PATH", help="start every scenario from this save state")
+    args = parser.parse_args()
+
+    names = args.scenarios or list(SCENARIOS)
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+    results = run(names, args.ticks, args.warmup, args.seed, args.state)
+    with open(args.out, "w") as out:
+        json.dump(results, out, indent=2)
+    print(f"Wrote {args.out}")
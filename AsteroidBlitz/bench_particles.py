@@ -0,0 +1,51 @@
+# Frame-time comparison between the old per-particle Surface draw path and
+# ParticleSystem's batched draw. Runs headless:
+#     python bench_particles.py [frames]
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from particles import ParticleSystem
+
+WIDTH = 1280
+HEIGHT = 720
+
+
+# What ParticleEffect.draw used to do: one new Surface per particle per frame
+def draw_per_surface(particles, surface):
+    for i in particles.alive().tolist():
+        size = int(particles.size[i])
+        particle_surface = pygame.Surface((size, size))
+        particle_surface.fill(particles.palette[particles.color[i]])
+        particle_surface.set_alpha(min(255, int(particles.lifetime[i]) * 6))
+        surface.blit(particle_surface, (float(particles.position[i, 0]), float(particles.position[i, 1])))
+
+
+def time_frames(draw, particles, screen, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.fill((0, 0, 0))
+        draw(particles, screen)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main(frames=30):
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    colors = [(0, 219, 255), (255, 16, 240), (57, 255, 20)]
+    print(f"{'particles':>10} {'per-surface ms':>15} {'batched ms':>11} {'speedup':>8}")
+    for count in (1000, 5000, 20000, 50000):
+        particles = ParticleSystem(capacity=count, seed=0)
+        for i in range(count // 20):
+            particles.emit((i * 37) % WIDTH, (i * 91) % HEIGHT, colors[i % 3], 20)
+        old = time_frames(draw_per_surface, particles, screen, frames)
+        new = time_frames(ParticleSystem.draw, particles, screen, frames)
+        print(f"{count:>10} {old:>15.2f} {new:>11.2f} {old / new:>7.1f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
@@ -0,0 +1,108 @@
+# Packed asset bundle: every file under layers/ in one file, so a deployment
+# ships a single file and loading is one sequential read instead of many
+# small opens. Images are stored already decoded as RGBA pixels and read
+# through a memory map, so pygame.image.frombuffer() wraps them without a
+# copy; anything else (the music) is stored as the original bytes.
+#
+#     python bundle.py                      # writes asteroidblitz.bundle
+#     python main.py --bundle               # plays from it
+#
+# File layout: header, JSON index of name -> entry, then the data, each
+# entry aligned to ALIGN bytes.
+import argparse
+import json
+import mmap
+import os
+import struct
+
+import pygame
+
+MAGIC = b"ABB1"
+HEADER = struct.Struct("<4sI")  # magic, index length
+ALIGN = 16
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class AssetBundle:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as source:
+            self.map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not an Asteroid Blitz asset bundle")
+        self.index = json.loads(self.map[HEADER.size:HEADER.size + index_length])
+        self.view = memoryview(self.map)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def data(self, name):
+        entry = self.index[name]
+        return self.view[entry["offset"]:entry["offset"] + entry["length"]]
+
+    # A Surface over the mapped pixels; the bundle must stay open while it is
+    # in use, so convert or scale it into a surface of its own
+    def image(self, name):
+        return pygame.image.frombuffer(self.data(name), self.index[name]["size"], "RGBA")
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+
+def build(root, names, out_path):
+    index = {}
+    blobs = []
+    offset = 0
+    for name in names:
+        path = os.path.join(root, name)
+        entry = {}
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            image = pygame.image.load(path)
+            entry["size"] = image.get_size()
+            blob = pygame.image.tobytes(image, "RGBA")
+        else:
+            with open(path, "rb") as source:
+                blob = source.read()
+        entry["offset"] = offset  # Relative to the data for now
+        entry["length"] = len(blob)
+        index[name] = entry
+        padding = -len(blob) % ALIGN
+        blobs.append(blob + bytes(padding))
+        offset += len(blob) + padding
+
+    # Offsets only become absolute once the index size is known, which in turn
+    # depends on the offsets' digits; grow the reserved space until it fits
+    reserved = 0
+    while True:
+        start = HEADER.size + reserved
+        start += -start % ALIGN
+        encoded = json.dumps({name: {**entry, "offset": entry["offset"] + start}
+                              for name, entry in index.items()}, separators=(",", ":")).encode()
+        if len(encoded) <= start - HEADER.size:
+            break
+        reserved = len(encoded) + 64
+    with open(out_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, len(encoded)))
+        out.write(encoded.ljust(start - HEADER.size, b" "))
+        for blob in blobs:
+            out.write(blob)
+    return out_path
+
+
+def asset_names(root, directory="layers"):
+    return sorted(f"{directory}/{name}" for name in os.listdir(os.path.join(root, directory))
+                  if os.path.isfile(os.path.join(root, directory, name)))
+
+
+if __name__ == "__main__":
+    root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Pack the game's assets into one bundle file")
+    parser.add_argument("--out", default=os.path.join(root, "asteroidblitz.bundle"))
+    args = parser.parse_args()
+
+    names = asset_names(root)
+    build(root, names, args.out)
+    print(f"Packed {len(names)} assets into {args.out} ({os.path.getsize(args.out) / 1024:.0f} KiB)")
@@ -0,0 +1,133 @@
+from collections import defaultdict
+
+import numpy as np
+
+
+# Uniform-grid broadphase shared by every collision query in a frame.
+# Sprites are bucketed by the cells their rect covers; queries only look at
+# sprites in the cells the query rect covers. Results come back in group
+# order and with the same kill semantics as pygame.sprite.spritecollide, so
+# it can be swapped in without changing gameplay.
+#
+# Rebuild once per frame after sprites have moved, then insert() any sprite
+# that is added to a tracked group later in the same frame.
+class SpatialHash:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.order = {}  # sprite -> insertion index, which follows group order
+
+    def clear(self):
+        self.cells.clear()
+        self.order.clear()
+
+    def rebuild(self, *groups):
+        self.clear()
+        for group in groups:
+            for sprite in group:
+                self.insert(sprite)
+
+    def insert(self, sprite):
+        if sprite in self.order:
+            return
+        self.order[sprite] = len(self.order)
+        for cell in self.cells_for(sprite.rect):
+            self.cells[cell].append(sprite)
+
+    def cells_for(self, rect):
+        size = self.cell_size
+        left = rect.left // size
+        top = rect.top // size
+        right = max(left, (rect.right - 1) // size)
+        bottom = max(top, (rect.bottom - 1) // size)
+        return [(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1)]
+
+    def query(self, rect, group):
+        cells = self.cells
+        candidates = set()
+        for cell in self.cells_for(rect):
+            if cell in cells:
+                candidates.update(cells[cell])
+        # Sprites killed since the rebuild are still bucketed; group membership filters them
+        hits = [sprite for sprite in candidates if sprite in group and rect.colliderect(sprite.rect)]
+        hits.sort(key=self.order.__getitem__)
+        return hits
+
+    def spritecollide(self, sprite, group, dokill, collided=None):
+        hits = self.query(sprite.rect, group)
+        if collided is not None:
+            hits = [other for other in hits if collided(sprite, other)]
+        if dokill:
+            for other in hits:
+                other.kill()
+        return hits
+
+
+# Swept circle test. Circle i moves from starts[i] to ends[i] over the tick
+# and target j from target_starts[j] to target_ends[j]; both move linearly,
+# so they touch at the first t in [0, 1] where the distance between them is
+# radii[i] + target_radii[j]. Pairs are only solved for targets whose x
+# range the mover can reach (sort and sweep on x), so the cost grows with
+# the number of nearby pairs rather than movers x targets.
+#
+# Returns (mover indices, target indices, times) for the earliest hit of
+# every mover that hits anything, ordered by mover index; ties go to the
+# lower target index.
+def sweep_circles(starts, ends, radii, target_starts, target_ends, target_radii):
+    none = np.zeros(0, dtype=np.int64)
+    if not len(starts) or not len(target_starts):
+        return none, none, np.zeros(0)
+
+    # Candidate pairs: targets whose end x lies within reach of the mover's x range
+    target_x = target_ends[:, 0]
+    order = np.argsort(target_x, kind="stable")
+    sorted_x = target_x[order]
+    drift = np.abs(target_ends[:, 0] - target_starts[:, 0]).max()
+    reach = radii + target_radii.max() + drift
+    low = np.searchsorted(sorted_x, np.minimum(starts[:, 0], ends[:, 0]) - reach, "left")
+    high = np.searchsorted(sorted_x, np.maximum(starts[:, 0], ends[:, 0]) + reach, "right")
+    counts = high - low
+    total = int(counts.sum())
+    if not total:
+        return none, none, np.zeros(0)
+    movers = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    targets = order[np.repeat(low, counts) + offsets]
+
+    # Relative motion: the target stays put and the mover travels f -> f + d.
+    # (take() rather than fancy indexing; it is much faster on 2-D rows.)
+    f = starts.take(movers, axis=0) - target_starts.take(targets, axis=0)
+    d = (ends - starts).take(movers, axis=0) - (target_ends - target_starts).take(targets, axis=0)
+    reach = radii.take(movers) + target_radii.take(targets)
+    a = np.einsum("ij,ij->i", d, d)
+    b = 2 * np.einsum("ij,ij->i", f, d)
+    c = np.einsum("ij,ij->i", f, f) - reach * reach
+    discriminant = b * b - 4 * a * c
+    moving = a > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (-b - np.sqrt(discriminant)) / (2 * a)
+    # Touching at the start, or closing in and touching during the tick
+    hit = (c <= 0) | (moving & (discriminant >= 0) & (t >= 0) & (t <= 1))
+    t = np.where(c <= 0, 0.0, t)
+
+    movers, targets, t = movers[hit], targets[hit], t[hit]
+    first = np.lexsort((targets, t, movers))
+    movers, targets, t = movers[first], targets[first], t[first]
+    _, earliest = np.unique(movers, return_index=True)
+    return movers[earliest], targets[earliest], t[earliest]
+
+
+# Earliest hit along every live row's path in the `movers` EntityStore
+# (or only the rows in `slots`) against the live rows of the `targets`
+# stores, using each store's previous and current positions and radius.
+# Returns (mover sprite, target sprite) pairs in mover slot order.
+def swept_hits(movers, targets, slots=None):
+    slots = movers.live_slots() if slots is None else np.asarray(slots, dtype=np.int64)
+    target_slots = [(store, store.live_slots()) for store in targets]
+    if not slots.size or not any(live.size for _, live in target_slots):
+        return []
+    columns = [np.concatenate([getattr(store, name)[live] for store, live in target_slots])
+               for name in ("previous", "position", "radius")]
+    sprites = np.concatenate([store.sprites[live] for store, live in target_slots])
+    hit, target, _ = sweep_circles(movers.previous[slots], movers.position[slots], movers.radius[slots], *columns)
+    return list(zip(movers.sprites[slots[hit]].tolist(), sprites[target].tolist()))
@@ -0,0 +1,81 @@
+import pygame
+
+
+# Keys for the profiler, logging and quick save/load. They act on the
+# session rather than the simulation, so they are kept out of events() and
+# can never be recorded, replayed or fed in by a script.
+TOOL_KEYS = (pygame.K_F3, pygame.K_F4, pygame.K_F5, pygame.K_F6, pygame.K_F9)
+
+
+# Where ModernGame gets its input from. events() is called once per tick and
+# returns that tick's events; pressed() returns the keys currently held down,
+# indexable by key constant like pygame.key.get_pressed(). after_step(game)
+# is called at the end of every tick. tool_keys() returns the TOOL_KEYS
+# pressed since it was last called, for the interactive game loop.
+class KeyboardControls:
+    def __init__(self):
+        self.tools = []
+
+    def events(self):
+        events = []
+        for event in pygame.event.get():
+            if event.type == pygame.KEYDOWN and event.key in TOOL_KEYS:
+                self.tools.append(event.key)
+            else:
+                events.append(event)
+        return events
+
+    def pressed(self):
+        return pygame.key.get_pressed()
+
+    def tool_keys(self):
+        keys, self.tools = self.tools, []
+        return keys
+
+    def after_step(self, game):
+        pass
+
+
+# Input driven by a script instead of the keyboard, for headless runs.
+# script(tick) returns (keys held down, keys pressed this tick).
+class ScriptedControls:
+    def __init__(self, script=None):
+        self.script = script or idle
+        self.tick = -1
+        self.held = HeldKeys()
+
+    def events(self):
+        self.tick += 1
+        held, presses = self.script(self.tick)
+        self.held = HeldKeys(held)
+        return [pygame.event.Event(pygame.KEYDOWN, key=key) for key in presses]
+
+    def pressed(self):
+        return self.held
+
+    def tool_keys(self):
+        return []
+
+    def after_step(self, game):
+        pass
+
+
+# Input chosen from the game state, for simulated players. bot(tick, game)
+# returns (keys held down, keys pressed this tick) like a script does; `game`
+# is the state at the end of the previous tick, None on the first one.
+class BotControls(ScriptedControls):
+    def __init__(self, bot):
+        super().__init__(lambda tick: bot(tick, self.game))
+        self.game = None
+
+    def after_step(self, game):
+        self.game = game
+
+
+class HeldKeys(frozenset):
+    def __getitem__(self, key):
+        return key in self
+
+
+def idle(tick):
+    return (), ()
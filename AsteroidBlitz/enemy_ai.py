@@ -0,0 +1,113 @@
+import numpy as np
+
+from entities import EntityStore
+
+# Behavior profiles. Delays are in 60 Hz frames, speeds in pixels per frame.
+#   wander - picks a random heading every turn_delay frames
+#   chase  - heads straight for the player
+#   strafe - circles the player, switching sides every turn_delay frames
+#   boss   - slow wander, fires a spread of `shots` projectiles
+# `level` is the first level a profile can spawn at; the boss is not drawn
+# at random but spawned once on every level that is a multiple of 5.
+ENEMY_PROFILES = {
+    "wander": {"speed": 2, "shoot_delay": 20, "turn_delay": 60, "shots": 1, "spread": 0,
+               "health": 50, "size": 50, "level": 1},
+    "chase": {"speed": 1.5, "shoot_delay": 30, "turn_delay": 60, "shots": 1, "spread": 0,
+              "health": 50, "size": 50, "level": 3},
+    "strafe": {"speed": 2.5, "shoot_delay": 25, "turn_delay": 90, "shots": 2, "spread": 10,
+               "health": 75, "size": 50, "level": 5},
+    "boss": {"speed": 0.75, "shoot_delay": 45, "turn_delay": 120, "shots": 7, "spread": 12,
+             "health": 500, "size": 100, "level": None},
+}
+PROFILE_NAMES = list(ENEMY_PROFILES)
+WANDER, CHASE, STRAFE, BOSS = range(len(PROFILE_NAMES))
+BOSS_EVERY = 5
+INVULNERABLE_FRAMES = 30  # After spawning
+
+
+def profile_column(key):
+    return np.array([ENEMY_PROFILES[name][key] for name in PROFILE_NAMES], dtype=np.float64)
+
+
+# Batched enemy AI. Timers, headings and aim for every enemy are updated in
+# one pass over NumPy columns; update() returns the shots fired this tick so
+# the game can spawn them together. Random headings are drawn from the game's
+# RNG, one pair per turning enemy in slot order, so seeded runs stay
+# reproducible.
+class EnemyController(EntityStore):
+    COLUMNS = EntityStore.COLUMNS + (
+        ("profile", (), np.int32, WANDER),
+        ("heading", (2,), np.float64, 0),  # Unit vector for wander and boss
+        ("side", (), np.float64, 1),  # Strafing direction, +1 or -1
+        ("shoot_timer", (), np.float64, 0),
+        ("turn_timer", (), np.float64, 0),
+    )
+    SPEED = profile_column("speed")
+    SHOOT_DELAY = profile_column("shoot_delay")
+    TURN_DELAY = profile_column("turn_delay")
+    SHOTS = profile_column("shots").astype(np.int64)
+    SPREAD = profile_column("spread")
+
+    def add_enemy(self, sprite, x, y, profile):
+        slot = self.add(sprite)
+        self.position[slot] = (x, y)
+        self.profile[slot] = PROFILE_NAMES.index(profile)
+        self.radius[slot] = ENEMY_PROFILES[profile]["size"] / 2
+        return slot
+
+    def update(self, target, rng, step=1.0):
+        slots = self.live_slots()
+        if not slots.size:
+            return slots, np.zeros((0, 2)), np.zeros(0)
+        profile = self.profile[slots]
+
+        # New headings for wanderers, side switches for strafers
+        turn = self.turn_timer[slots]
+        turning = turn <= 0
+        self.turn_timer[slots] = np.where(turning, self.TURN_DELAY[profile], turn - step)
+        turned = slots[turning]
+        if turned.size:
+            headings = np.array([rng.uniform(-1, 1) for _ in range(2 * turned.size)]).reshape(-1, 2)
+            lengths = np.hypot(headings[:, 0], headings[:, 1])
+            self.heading[turned] = headings / np.where(lengths > 0, lengths, 1)[:, None]
+            self.side[turned] *= -1
+
+        centers = self.centers(slots)
+        to_target = np.asarray(target, dtype=np.float64) - centers
+        distance = np.hypot(to_target[:, 0], to_target[:, 1])
+        toward = to_target / np.where(distance > 0, distance, 1)[:, None]
+        heading = self.heading[slots]
+        heading = np.where((profile == CHASE)[:, None], toward, heading)
+        around = np.stack([-toward[:, 1], toward[:, 0]], axis=1) * self.side[slots][:, None]
+        heading = np.where((profile == STRAFE)[:, None], around, heading)
+        self.velocity[slots] = heading * self.SPEED[profile][:, None]
+        self.previous[slots] = self.position[slots]
+        self.position[slots] += self.velocity[slots] * step
+
+        # Shooting
+        shoot = self.shoot_timer[slots]
+        firing = shoot <= 0
+        self.shoot_timer[slots] = np.where(firing, self.SHOOT_DELAY[profile], shoot - step)
+        if not firing.any():
+            return slots, np.zeros((0, 2)), np.zeros(0)
+        # Aim from where the enemies are after moving, as Rect centers
+        centers = self.centers(slots[firing])
+        to_target = np.asarray(target, dtype=np.float64) - centers
+        aim = np.degrees(np.arctan2(to_target[:, 1], to_target[:, 0]))
+        shots = self.SHOTS[profile[firing]]
+        spread = self.SPREAD[profile[firing]]
+        # Fan each enemy's shots evenly around its aim
+        index = np.arange(shots.sum()) - np.repeat(np.cumsum(shots) - shots, shots)
+        angles = np.repeat(aim, shots) + (index - (np.repeat(shots, shots) - 1) / 2) * np.repeat(spread, shots)
+        origins = np.repeat(centers, shots, axis=0)
+        return slots, origins, angles
+
+
+def boss_due(level, last_boss_level):
+    return level % BOSS_EVERY == 0 and level != last_boss_level
+
+
+# Profiles an ordinary spawn can be drawn from at this level
+def unlocked_profiles(level):
+    return [name for name, profile in ENEMY_PROFILES.items()
+            if profile["level"] is not None and profile["level"] <= level]
@@ -0,0 +1,181 @@
+import numpy as np
+import pygame
+
+
+# Structure-of-arrays state for entities that only fly in a straight line
+# (asteroids, projectiles). Each entity owns one row; step() moves every live
+# row in one vectorized operation instead of one Python call per sprite.
+#
+# Like Pool, rows of removed entities are parked until flush(), so a sprite
+# killed this tick still reads back its last position and velocity.
+class EntityStore:
+    # name, per-row shape, dtype, value a fresh row starts with
+    COLUMNS = (
+        ("position", (2,), np.float64, 0),
+        ("previous", (2,), np.float64, 0),  # Position before the last step, for swept collisions
+        ("velocity", (2,), np.float64, 0),
+        ("rotation", (), np.float64, 0),
+        ("spin", (), np.float64, 0),
+        ("size", (2,), np.int32, 0),  # Rect size, for culling
+        ("frame", (), np.int32, -1),  # Rotation step currently shown
+        ("tag", (), np.int32, 0),  # Free for the owner, e.g. a particle color
+        ("radius", (), np.float64, 0),  # Collision circle
+    )
+
+    def __init__(self, capacity=256):
+        self.capacity = 0
+        for name, shape, dtype, _ in self.COLUMNS:
+            setattr(self, name, np.zeros((0,) + shape, dtype=dtype))
+        self.live = np.zeros(0, dtype=bool)
+        self.sprites = np.empty(0, dtype=object)
+        self.free = []
+        self.released = []
+        self.used = 0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        def extend(column, fill):
+            grown = np.full((capacity,) + column.shape[1:], fill, dtype=column.dtype)
+            grown[:self.capacity] = column
+            return grown
+
+        for name, _, _, fill in self.COLUMNS:
+            setattr(self, name, extend(getattr(self, name), fill))
+        self.live = extend(self.live, False)
+        self.sprites = extend(self.sprites, None)
+        self.capacity = capacity
+
+    def add(self, sprite):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.used == self.capacity:
+                self.grow(self.capacity * 2)
+            slot = self.used
+            self.used += 1
+        for name, _, _, fill in self.COLUMNS:
+            getattr(self, name)[slot] = fill
+        self.live[slot] = True
+        self.sprites[slot] = sprite
+        return slot
+
+    def remove(self, slot):
+        if self.live[slot]:
+            self.live[slot] = False
+            self.released.append(slot)
+
+    def flush(self):
+        for slot in self.released:
+            self.sprites[slot] = None
+        self.free.extend(self.released)
+        self.released.clear()
+
+    # Forget every row, e.g. when a new game starts
+    def clear(self):
+        self.live[:] = False
+        self.sprites[:] = None
+        self.free.clear()
+        self.released.clear()
+        self.used = 0
+
+    # Every column and the row bookkeeping as plain lists, for save states.
+    # Taken between ticks, when no rows are waiting in `released`.
+    def snapshot(self):
+        state = {"used": self.used, "free": list(self.free)}
+        for name, _, _, _ in self.COLUMNS:
+            state[name] = getattr(self, name)[:self.used].tolist()
+        return state
+
+    # Load a snapshot() back. Rows come back empty; each sprite then claims
+    # its old row with bind(), so slot order, and with it the order rows are
+    # stepped in, is the same as when the snapshot was taken.
+    def restore(self, state):
+        self.clear()
+        used = state["used"]
+        if used > self.capacity:
+            self.grow(max(used, self.capacity * 2))
+        for name, _, _, fill in self.COLUMNS:
+            column = getattr(self, name)
+            column[:] = fill
+            if name in state:  # Columns added since the snapshot start out at their fill
+                column[:used] = np.asarray(state[name], dtype=column.dtype).reshape((used,) + column.shape[1:])
+        self.free = list(state["free"])
+        self.used = used
+
+    def bind(self, sprite, slot):
+        self.live[slot] = True
+        self.sprites[slot] = sprite
+        sprite.slot = slot
+
+    def live_slots(self):
+        return np.flatnonzero(self.live[:self.used])
+
+    # Advance every live entity by `step` 60 Hz frames; returns their slots
+    def step(self, step=1.0):
+        slots = self.live_slots()
+        if slots.size:
+            self.previous[slots] = self.position[slots]
+            self.position[slots] += self.velocity[slots] * step
+            self.rotation[slots] += self.spin[slots] * step
+        return slots
+
+    # Integer centers as pygame's Rect rounds them (halves away from zero)
+    def centers(self, slots):
+        position = self.position[slots]
+        return (np.sign(position) * np.floor(np.abs(position) + 0.5)).astype(np.int64)
+
+    # Rects (left, top, right, bottom) of the given rows, built the way
+    # Rect.center = position would
+    def rects(self, slots):
+        centers = self.centers(slots)
+        size = self.size[slots]
+        topleft = centers - size // 2
+        return topleft[:, 0], topleft[:, 1], topleft[:, 0] + size[:, 0], topleft[:, 1] + size[:, 1]
+
+
+# Sprite facade over an EntityStore row. position and velocity read back as
+# Vector2 copies and are written by assignment.
+class StoredSprite(pygame.sprite.Sprite):
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+        self.slot = None
+
+    # Claim a fresh row; called from reset(), so recycled sprites get one too
+    def attach(self):
+        self.slot = self.store.add(self)
+
+    def detach(self):
+        self.store.remove(self.slot)
+
+    @property
+    def position(self):
+        return pygame.math.Vector2(self.store.position[self.slot].tolist())
+
+    @position.setter
+    def position(self, value):
+        self.store.position[self.slot] = tuple(value)
+
+    @property
+    def velocity(self):
+        return pygame.math.Vector2(self.store.velocity[self.slot].tolist())
+
+    @velocity.setter
+    def velocity(self, value):
+        self.store.velocity[self.slot] = tuple(value)
+
+    @property
+    def rotation(self):
+        return float(self.store.rotation[self.slot])
+
+    @rotation.setter
+    def rotation(self, value):
+        self.store.rotation[self.slot] = value
+
+    @property
+    def rotation_speed(self):
+        return float(self.store.spin[self.slot])
+
+    @rotation_speed.setter
+    def rotation_speed(self, value):
+        self.store.spin[self.slot] = value
@@ -0,0 +1,209 @@
+# Batch simulation farm for balancing. Runs many headless games across a
+# process pool, one session per (parameter set, seed), each with a scripted
+# or bot player, streams every result to a JSON lines file as it arrives and
+# prints a summary table per parameter set.
+#
+#     python farm.py --seeds 200 --set enemy_spawn_delay=60,120,240 --set power_up_chance=0.005,0.01
+#
+# Sessions share nothing, so throughput scales with the number of workers
+# (one per core by default).
+import argparse
+import itertools
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pygame
+
+import headless
+import main
+from controls import BotControls, ScriptedControls, idle
+from profiler import percentiles
+
+# ModernGame attributes a sweep may set, with the game's defaults
+PARAMETERS = {
+    "enemy_spawn_delay": 120,
+    "asteroid_base": 5,
+    "projectile_damage": 25,
+    "asteroid_damage": 1,
+    "power_up_chance": 0.01,
+}
+
+
+# Steers away from the nearest asteroid or enemy within reach, otherwise
+# drifts back to the lower middle of the screen; fires on a fixed cadence
+def dodger(tick, game):
+    if game is None:
+        return (), ()
+    player = game.player
+    x, y = player.rect.center
+    nearest = None
+    reach = 180 ** 2
+    for group in (game.asteroids, game.enemies):
+        for sprite in group:
+            dx = sprite.rect.centerx - x
+            dy = sprite.rect.centery - y
+            distance = dx * dx + dy * dy
+            if distance < reach:
+                reach = distance
+                nearest = (-dx, -dy)
+    if nearest is None:
+        nearest = (main.WIDTH // 2 - x, main.HEIGHT * 2 // 3 - y)
+        if abs(nearest[0]) < 60 and abs(nearest[1]) < 60:
+            nearest = (0, 0)
+
+    held = []
+    if nearest[0] < 0:
+        held.append(pygame.K_LEFT)
+    elif nearest[0] > 0:
+        held.append(pygame.K_RIGHT)
+    if nearest[1] < 0:
+        held.append(pygame.K_UP)
+    elif nearest[1] > 0:
+        held.append(pygame.K_DOWN)
+    presses = []
+    if tick % 8 == 0 and player.ammunition > 0:
+        presses.append(pygame.K_SPACE)
+    if tick % 30 == 0 and player.shotgun_ammo >= 3 and game.enemies:
+        presses.append(pygame.K_q)
+    return held, presses
+
+
+# name -> builds the controls for one session
+PLAYERS = {
+    "idle": lambda: ScriptedControls(idle),
+    "fire": lambda: ScriptedControls(headless.fire),
+    "dodger": lambda: BotControls(dodger),
+}
+
+
+def init_worker():
+    if main.screen is None:
+        main.init_display(headless=True)
+
+
+# One session, run in a worker process. Plays until game over or `ticks`.
+def run_session(params, seed, player="dodger", ticks=60 * 60 * 5, sample_every=60 * 10):
+    init_worker()
+    game = main.ModernGame(seed=seed, controls=PLAYERS[player]())
+    for name, value in params.items():
+        setattr(game, name, value)
+
+    tick_times = []
+    score_curve = []
+    clock = time.perf_counter
+    for tick in range(ticks):
+        start = clock()
+        game.step()
+        tick_times.append(clock() - start)
+        if tick % sample_every == sample_every - 1:
+            score_curve.append(game.score)
+        if game.game_over:
+            break
+    return {
+        "params": params,
+        "seed": seed,
+        "player": player,
+        "ticks": len(tick_times),
+        "survived": not game.game_over,
+        "score": game.score,
+        "level": game.level,
+        "score_curve": score_curve,
+        "tick_ms": percentiles([t * 1000 for t in tick_times]),
+    }
+
+
+# Every combination of the swept values, each merged over the defaults
+def parameter_sets(sweep):
+    names = list(sweep)
+    return [{**PARAMETERS, **dict(zip(names, values))} for values in itertools.product(*sweep.values())]
+
+
+# Yields session results in the order they finish
+def run_farm(param_sets, seeds, player="dodger", ticks=60 * 60 * 5, workers=None):
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(run_session, params, seed, player, ticks)
+                   for params in param_sets for seed in seeds]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def summarize(results, swept):
+    groups = {}
+    for result in results:
+        key = tuple(result["params"][name] for name in swept)
+        groups.setdefault(key, []).append(result)
+    rows = []
+    for key, runs in sorted(groups.items()):
+        rows.append({
+            **dict(zip(swept, key)),
+            "runs": len(runs),
+            "alive %": round(100 * sum(run["survived"] for run in runs) / len(runs), 1),
+            "survival s": round(statistics.mean(run["ticks"] for run in runs) / 60, 1),
+            "score": round(statistics.mean(run["score"] for run in runs), 1),
+            "level": round(statistics.mean(run["level"] for run in runs), 2),
+            "max level": max(run["level"] for run in runs),
+            "tick ms p50": round(statistics.mean(run["tick_ms"]["p50"] for run in runs), 3),
+            "tick ms p99": round(statistics.mean(run["tick_ms"]["p99"] for run in runs), 3),
+        })
+    return rows
+
+
+def format_table(rows):
+    if not rows:
+        return "no results"
+    columns = list(rows[0])
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(str(row[column]).rjust(width) for column, width in zip(columns, widths)) for row in rows]
+    return "\n".join(lines)
+
+
+def parse_sweep(assignments):
+    sweep = {}
+    for assignment in assignments:
+        name, _, values = assignment.partition("=")
+        if name not in PARAMETERS:
+            raise ValueError(f"unknown parameter {name!r}, expected one of: {', '.join(PARAMETERS)}")
+        sweep[name] = [type(PARAMETERS[name])(value) if "." not in value else float(value)
+                       for value in values.split(",")]
+    return sweep
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many headless sessions for balancing sweeps")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=V1,V2",
+                        help=f"values to sweep; any of: {', '.join(PARAMETERS)}")
+    parser.add_argument("--seeds", type=int, default=50, help="sessions per parameter set")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--player", choices=sorted(PLAYERS), default="dodger")
+    parser.add_argument("--ticks", type=int, default=60 * 60 * 5, help="session length limit")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="farm_results.jsonl", help="every session's result, one JSON per line")
+    args = parser.parse_args()
+
+    try:
+        sweep = parse_sweep(args.set)
+    except ValueError as error:
+        parser.error(str(error))
+    param_sets = parameter_sets(sweep)
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    total = len(param_sets) * len(seeds)
+    print(f"{total} sessions ({len(param_sets)} parameter sets x {len(seeds)} seeds) on {args.workers} workers")
+
+    results = []
+    start = time.perf_counter()
+    with open(args.out, "w") as out:
+        for result in run_farm(param_sets, seeds, args.player, args.ticks, args.workers):
+            results.append(result)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            print(f"\r{len(results)}/{total} sessions", end="", flush=True)
+    elapsed = time.perf_counter() - start
+    ticks = sum(result["ticks"] for result in results)
+    print(f"\r{total} sessions, {ticks} ticks in {elapsed:.1f}s "
+          f"({total / elapsed:.1f} sessions/s, {ticks / elapsed:.0f} ticks/s)")
+    print(format_table(summarize(results, list(sweep))))
+    print(f"Wrote {args.out}")
@@ -0,0 +1,115 @@
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+ROOT = "asteroidblitz"
+LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING,
+          "error": logging.ERROR, "off": logging.CRITICAL + 10}
+
+channels = {}
+listener = None
+
+
+# One log category ("projectile", "collision", ...) on top of a stdlib logger.
+# `debug` and `info` are plain attributes kept in sync with the level, so hot
+# paths guard with `if log.debug:` and a disabled channel costs one attribute
+# lookup. Events can be sampled (keep 1 in `sample`) and rate limited to
+# `rate` per second with bursts of up to `burst`.
+class Channel:
+    def __init__(self, name):
+        self.name = name
+        self.logger = logging.getLogger(f"{ROOT}.{name}")
+        self.sample = 1
+        self.rate = None
+        self.burst = 0
+        self.tokens = 0.0
+        self.last_refill = time.monotonic()
+        self.seen = 0
+        self.dropped = 0
+        self.refresh()
+
+    def refresh(self):
+        self.debug = self.logger.isEnabledFor(logging.DEBUG)
+        self.info = self.logger.isEnabledFor(logging.INFO)
+
+    def set_level(self, level):
+        self.logger.setLevel(LEVELS[level] if isinstance(level, str) else level)
+        self.refresh()
+
+    def limit(self, rate=None, burst=None, sample=1):
+        self.rate = rate
+        self.burst = burst if burst is not None else (rate or 0)
+        self.tokens = float(self.burst)
+        self.sample = max(1, sample)
+
+    def allow(self):
+        self.seen += 1
+        if self.seen % self.sample:
+            self.dropped += 1
+            return False
+        if self.rate is not None:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens < 1:
+                self.dropped += 1
+                return False
+            self.tokens -= 1
+        return True
+
+    def event(self, name, level=logging.DEBUG, **fields):
+        if not self.logger.isEnabledFor(level) or not self.allow():
+            return
+        self.logger.log(level, "%s %s", name, " ".join(f"{key}={value}" for key, value in fields.items()),
+                        extra={"event": name, "fields": fields})
+
+
+def channel(name):
+    if name not in channels:
+        channels[name] = Channel(name)
+    return channels[name]
+
+
+def set_level(name, level):
+    channel(name).set_level(level)
+
+
+def configure(spec=None, path=None, buffer=256):
+    # spec looks like "projectile=debug,collision=info"; it defaults to the
+    # ASTEROIDBLITZ_LOG environment variable. Records are handed to a queue
+    # and written by a background thread in batches of `buffer`, so logging
+    # never blocks the game loop on I/O.
+    global listener
+    stop()
+    root = logging.getLogger(ROOT)
+    root.setLevel(logging.WARNING)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    target = logging.FileHandler(path) if path else logging.StreamHandler(sys.stderr)
+    target.setFormatter(logging.Formatter("%(relativeCreated)9.1f %(name)s %(levelname)s %(message)s"))
+    buffered = logging.handlers.MemoryHandler(buffer, flushLevel=logging.WARNING, target=target)
+    records = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    listener = logging.handlers.QueueListener(records, buffered)
+    listener.start()
+
+    spec = os.environ.get("ASTEROIDBLITZ_LOG", "") if spec is None else spec
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        set_level(name, level or "debug")
+    for existing in channels.values():
+        existing.refresh()
+
+
+def stop():
+    global listener
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+        listener = None
@@ -0,0 +1,103 @@
+# Headless, deterministic fast-forward runner. Uses SDL's dummy video and
+# audio drivers, a seeded RNG and scripted input, and steps the simulation as
+# fast as the CPU allows instead of at 60 ticks per second.
+#
+#     python headless.py --ticks 216000 --seed 7 --script fire
+#     python headless.py --ticks 36000 --immortal --save-state late.abs
+import argparse
+import time
+
+import pygame
+
+import gamelog
+import main
+import savestate
+from controls import ScriptedControls, idle
+from replay import Recorder, seed_arg
+
+
+def fire(tick):
+    # Sweep left and right while firing, with a shotgun burst every second
+    held = (pygame.K_LEFT,) if (tick // 120) % 2 else (pygame.K_RIGHT,)
+    presses = [pygame.K_SPACE] if tick % 10 == 0 else []
+    if tick % 60 == 0:
+        presses.append(pygame.K_q)
+    return held, presses
+
+
+SCRIPTS = {
+    "idle": idle,
+    "fire": fire,
+}
+
+
+def new_game(seed=0, script=None, record=False):
+    if main.screen is None:
+        main.init_display(headless=True)
+    controls = ScriptedControls(script)
+    if record:
+        controls = Recorder(controls)
+    return main.ModernGame(seed=seed, controls=controls)
+
+
+# `immortal` tops the player's health and shield up every tick, to reach late
+# levels for a save state
+def simulate(game, ticks, draw=False, stop_on_game_over=True, immortal=False):
+    for _ in range(ticks):
+        if immortal:
+            game.player.health = 100
+            game.player.shield = 100
+        game.step()
+        if draw:
+            game.draw()
+        if not game.running or (stop_on_game_over and game.game_over):
+            break
+    return game
+
+
+def run(ticks, seed=0, script=None, draw=False, record=False, immortal=False):
+    return simulate(new_game(seed, script, record), ticks, draw, immortal=immortal)
+
+
+def summary(game):
+    return {
+        "tick": game.controls.tick + 1,
+        "score": game.score,
+        "level": game.level,
+        "health": game.player.health,
+        "game_over": game.game_over,
+        "asteroids": len(game.asteroids),
+        "enemies": len(game.enemies),
+        "projectiles": len(game.projectiles),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Modern Asteroid Blitz headless")
+    parser.add_argument("--ticks", type=int, default=60 * 60)
+    parser.add_argument("--seed", type=seed_arg, default=0)
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="fire")
+    parser.add_argument("--draw", action="store_true", help="also render every tick")
+    parser.add_argument("--log", help='log levels, e.g. "projectile=debug"')
+    parser.add_argument("--log-file", help="write log events here instead of stderr")
+    parser.add_argument("--record", metavar="PATH", help="save the run as a recording for replay.py")
+    parser.add_argument("--immortal", action="store_true", help="keep the player alive")
+    parser.add_argument("--save-state", metavar="PATH", help="write the final game state, e.g. for bench.py --state")
+    args = parser.parse_args()
+    if args.immortal and args.record:
+        # Health is topped up outside the input stream, so a replay would desync
+        parser.error("--immortal cannot be combined with --record")
+    gamelog.configure(args.log, args.log_file)
+
+    start = time.perf_counter()
+    game = run(args.ticks, args.seed, SCRIPTS[args.script], args.draw, record=bool(args.record), immortal=args.immortal)
+    elapsed = time.perf_counter() - start
+    if args.record:
+        game.controls.save(args.record, main.SIM_RATE)
+    if args.save_state:
+        savestate.save(args.save_state, game.snapshot())
+    result = summary(game)
+    print(result)
+    print(f"{result['tick']} ticks in {elapsed:.2f}s "
+          f"({result['tick'] / elapsed:.0f} ticks/s, {result['tick'] / 60 / elapsed:.0f}x real time)")
+    gamelog.stop()
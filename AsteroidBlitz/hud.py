@@ -0,0 +1,102 @@
+from collections import OrderedDict
+
+import pygame
+
+
+# Rendered text, keyed by (text, size, color). Fonts are opened once per
+# size; the least recently used strings are dropped past `limit` entries,
+# so a climbing score does not grow the cache forever.
+class TextCache:
+    def __init__(self, limit=512):
+        self.limit = limit
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = self.font(size).render(text, True, color)
+        if len(self.surfaces) > self.limit:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    # Blit text centered on `center`; returns the rect drawn
+    def blit_centered(self, target, text, size, color, center):
+        surface = self.render(text, size, color)
+        return target.blit(surface, surface.get_rect(center=center))
+
+    def stats(self):
+        return {"entries": len(self.surfaces), "hits": self.hits, "misses": self.misses}
+
+
+class TextWidget:
+    def __init__(self, position, size, color, template):
+        self.position = position
+        self.size = size
+        self.color = color
+        self.template = template
+        self.value = None
+        self.drawn = None
+
+    def draw(self, surface, cache):
+        if self.drawn is not None:
+            surface.fill((0, 0, 0, 0), self.drawn)
+        text = cache.render(self.template.format(self.value), self.size, self.color)
+        # The area is fully transparent here, so copy the glyphs' color and
+        # alpha as they are instead of blending them onto nothing
+        self.drawn = surface.blit(text, self.position, special_flags=pygame.BLEND_RGBA_MAX)
+
+
+class BarWidget:
+    def __init__(self, rect, back, color):
+        self.rect = pygame.Rect(rect)
+        self.back = back
+        self.color = color
+        self.value = None
+
+    def draw(self, surface, cache):
+        pygame.draw.rect(surface, self.back, self.rect)
+        pygame.draw.rect(surface, self.color, (self.rect.x, self.rect.y, self.rect.width * self.value, self.rect.height))
+
+
+# A fixed screen region the HUD is composited into. Widgets only redraw
+# into the persistent panel surface when their value changes; each frame
+# costs one blit of the panel.
+class HudPanel:
+    def __init__(self, rect, cache):
+        self.rect = pygame.Rect(rect)
+        self.cache = cache
+        self.surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.widgets = {}
+        self.redraws = 0
+
+    def text(self, name, position, size, color, template="{}"):
+        self.widgets[name] = TextWidget(position, size, color, template)
+        return self
+
+    def bar(self, name, rect, back, color):
+        self.widgets[name] = BarWidget(rect, back, color)
+        return self
+
+    def set(self, name, value):
+        widget = self.widgets[name]
+        if widget.value != value:
+            widget.value = value
+            widget.draw(self.surface, self.cache)
+            self.redraws += 1
+
+    def draw(self, target):
+        return target.blit(self.surface, self.rect)
@@ -1,25 +1,82 @@
+import argparse
+import functools
 import pygame
 import random
 import math
 from pygame import mixer
 import os
+import time
+from particles import ParticleSystem
+from assets import AssetManager, ASSET_ROOT
+from background import ParallaxBackground
+from hud import TextCache, HudPanel
+from rotation import RotationCache
+from collision import SpatialHash, swept_hits
+from controls import KeyboardControls
+from replay import Recorder, seed_arg
+import savestate
+from entities import EntityStore, StoredSprite
+from enemy_ai import EnemyController, ENEMY_PROFILES, INVULNERABLE_FRAMES, boss_due, unlocked_profiles
+from profiler import FrameProfiler, ProfilerOverlay
+from quality import QualityGovernor, QUALITY_LEVELS
+from pool import Pool
+from scheduler import Scheduler
+from sound import SoundBank
+import gamelog
 #Test comment
-# Initialize Pygame and mixer
-pygame.init()
-mixer.init()
 
-mixer.init(frequency=44100, size=-16, channels=2, buffer=512)  # Default settings
-
-
-# Set up the display with a larger resolution
+# Display size, with a larger resolution
 WIDTH = 1280
 HEIGHT = 720
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Modern Asteroid Blitz")
-
-
-print("Current working directory:", os.getcwd())
-
+screen = None  # Set by init_display()
+
+# Initialize the display, fonts and mixer. Importing this module has no
+# side effects; call this first. Only the pygame modules the game uses are
+# started (pygame.init() would also bring up joysticks and the like).
+# Headless mode uses SDL's dummy video and audio drivers so the game can run
+# without a window or sound card.
+def init_display(headless=False, vsync=False):
+    global screen
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.display.init()
+    pygame.font.init()
+    mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+
+    if vsync:
+        # SDL only honours vsync on renderer-backed displays
+        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.SCALED, vsync=1)
+    else:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Modern Asteroid Blitz")
+    return screen
+
+
+# Fixed simulation timestep. Speeds, timers and per-tick chances are in
+# units of the original 60 Hz frame and get multiplied by STEP, so the game
+# plays the same at any SIM_RATE; at 60 STEP is 1.0 and every value is
+# exactly what it was per frame.
+SIM_RATE = 60
+STEP = 1.0
+MAX_CATCH_UP = 5  # Simulation ticks per rendered frame before time is dropped
+
+def set_sim_rate(rate):
+    global SIM_RATE, STEP
+    SIM_RATE = rate
+    STEP = 60 / rate
+
+# argparse type for --sim-rate; STEP divides by the rate, so it has to be a
+# whole number of ticks above zero
+def sim_rate_arg(text):
+    rate = int(text)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"simulation rate must be a positive number of ticks per second, got {rate}")
+    return rate
+
+# Whole ticks a timer of `frames` 60 Hz frames runs for at the current STEP
+def timer_ticks(frames):
+    return math.ceil(frames / STEP - 1e-9)
 
 # Colors with modern palette
 SPACE_BLUE = (13, 20, 36)
@@ -29,12 +86,13 @@ NEON_GREEN = (57, 255, 20)
 WHITE = (255, 255, 255)
 YELLOW = (255, 255, 0)
 
+# Every piece of HUD and menu text is rendered once per distinct string
+text_cache = TextCache()
+
 # Start Menu function
 def show_start_menu(screen):
     screen.fill((0, 0, 0))  # Black background
-    font = pygame.font.Font(None, 74)
-    title_text = font.render("Press Any Key to Start", True, (255, 255, 255))
-    screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, HEIGHT // 2 - title_text.get_height() // 2))
+    text_cache.blit_centered(screen, "Press Any Key to Start", 74, WHITE, (WIDTH // 2, HEIGHT // 2))
     pygame.display.flip()
     waiting = True
     while waiting:
@@ -47,9 +105,7 @@ def show_start_menu(screen):
 
 # Pause Menu function
 def show_pause_menu(screen):
-    font = pygame.font.Font(None, 74)
-    pause_text = font.render("Game Paused", True, (255, 255, 255))
-    screen.blit(pause_text, (WIDTH // 2 - pause_text.get_width() // 2, HEIGHT // 2 - pause_text.get_height() // 2))
+    text_cache.blit_centered(screen, "Game Paused", 74, WHITE, (WIDTH // 2, HEIGHT // 2))
     pygame.display.flip()
     paused = True
     while paused:
@@ -61,8 +117,39 @@ def show_pause_menu(screen):
                 if event.key == pygame.K_p:
                     paused = False
 
+# Every image and procedurally drawn surface is created once and shared
+assets = AssetManager()
+
+ENEMY_IMAGE = "layers/png-clipart-pixel-art-display-resolution-others-miscellaneous-angle_processed.png"
+
+# Parallax layers, bottom first: asset key, file, size, scroll speed. The
+# bottom layer is opaque and converted without alpha.
+BACKGROUND_LAYERS = (
+    ("background", "layers/parallax-space-backgound.png", (WIDTH, HEIGHT), 0.5),
+    # ("big-planet", "layers/parallax-space-big-planet.png", (WIDTH//2, HEIGHT//2), 1),
+    # ("far-planets", "layers/parallax-space-far-planets.png", (WIDTH, HEIGHT), 1.5),
+    # ("ring-planet", "layers/parallax-space-ring-planet.png", (WIDTH//4, HEIGHT//4), 2),
+    ("stars", "layers/parallax-space-stars.png", (WIDTH, HEIGHT), 2.5),
+)
+ASSET_CACHE_DIR = os.path.join(ASSET_ROOT, ".asset_cache")
+BUNDLE_PATH = os.path.join(ASSET_ROOT, "asteroidblitz.bundle")  # Built by bundle.py, read with --bundle
+
+# Start decoding every image file the game uses on a background thread, e.g.
+# while the start menu waits for a key
+def prefetch_assets():
+    boss_size = ENEMY_PROFILES["boss"]["size"]
+    return assets.prefetch([(key, path, size) for key, path, size, _ in BACKGROUND_LAYERS]
+                           + [("enemy", ENEMY_IMAGE, (50, 50)),
+                              (("enemy", boss_size), ENEMY_IMAGE, (boss_size, boss_size))])
+
 # Load and scale assets (using colored shapes as placeholders)
 def create_player_ship():
+    return assets.surface("player_ship", draw_player_ship)
+
+def create_shield_effect():
+    return assets.surface("shield", draw_shield_effect)
+
+def draw_player_ship():
     surface = pygame.Surface((40, 50), pygame.SRCALPHA)
     # Create a more detailed ship shape
     points = [(20, 0), (40, 45), (30, 35), (20, 45), (10, 35), (0, 45)]
@@ -71,120 +158,129 @@ def create_player_ship():
     pygame.draw.polygon(surface, NEON_PINK, [(15, 45), (25, 45), (20, 50)])
     return surface
 
-def create_shield_effect():
+def draw_shield_effect():
     surface = pygame.Surface((60, 60), pygame.SRCALPHA)
     pygame.draw.circle(surface, (*NEON_BLUE, 128), (30, 30), 29, 2)
     return surface
 
+def draw_projectile(size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.draw.circle(surface, color, (size[0]//2, size[1]//2), size[0]//2)
+    return surface
 
-class ParticleEffect:
-    def __init__(self, x, y, color):
-        self.particles = []
-        self.x = x
-        self.y = y
-        self.color = color
-        
-    def create_particles(self, amount):
-        for _ in range(amount):
-            particle = {
-                'x': self.x,
-                'y': self.y,
-                'velocity_x': random.uniform(-2, 2),
-                'velocity_y': random.uniform(-2, 2),
-                'lifetime': random.randint(20, 40),
-                'size': random.randint(2, 4)
-            }
-            self.particles.append(particle)
-            
-    def update(self):
-        surviving_particles = []
-        for particle in self.particles:
-            particle['x'] += particle['velocity_x']
-            particle['y'] += particle['velocity_y']
-            particle['lifetime'] -= 1
-            if particle['lifetime'] > 0:
-                surviving_particles.append(particle)
-        self.particles = surviving_particles
-        
-    def draw(self, surface):
-        for particle in self.particles:
-            alpha = min(255, particle['lifetime'] * 6)
-            particle_surface = pygame.Surface((particle['size'], particle['size']))
-            particle_surface.fill(self.color)
-            particle_surface.set_alpha(alpha)
-            surface.blit(particle_surface, (particle['x'], particle['y']))
-
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
+def draw_power_up(color):
+    surface = pygame.Surface((20, 20), pygame.SRCALPHA)
+    surface.fill(color)
+    return surface
 
-            # Load the sprite image
-        self.image = pygame.image.load("layers/png-clipart-pixel-art-display-resolution-others-miscellaneous-angle_processed.png").convert_alpha()
-        
-        # Scale the image if necessary
-        self.image = pygame.transform.scale(self.image, (50, 50))  # Adjust size as needed
+def preload_sprites():
+    # Build the shared sprite surfaces up front so they can be packed into the atlas
+    create_player_ship()
+    create_shield_effect()
+    assets.image("enemy", ENEMY_IMAGE, (50, 50))
+    assets.mask("enemy")
+    boss_size = ENEMY_PROFILES["boss"]["size"]
+    assets.image(("enemy", boss_size), ENEMY_IMAGE, (boss_size, boss_size))
+    assets.mask(("enemy", boss_size))
+    for projectile_type, (size, color, _) in PROJECTILE_TYPES.items():
+        assets.surface(("projectile", projectile_type), draw_projectile, size, color)
+    for power_type, color in POWER_UP_COLORS.items():
+        assets.surface(("power_up", power_type), draw_power_up, color)
+    assets.build_atlas()
+
+    # Rotations of the player ship and as many asteroid shapes as fit in
+    # three quarters of the cache, smallest spawn sizes first; the rest are
+    # rendered when first shown
+    limit = rotation_cache.budget * 3 // 4
+    rotation_cache.prerender(create_player_ship(), limit)
+    for size in range(ASTEROID_MIN_SIZE, ASTEROID_MAX_SIZE + 1):
+        for variant in range(ASTEROID_VARIANTS):
+            if not rotation_cache.prerender(assets.surface(("asteroid", size, variant), draw_asteroid, size, variant), limit):
+                return
+
+
+# Shared by every projectile trail, engine exhaust and explosion
+particle_system = ParticleSystem()
+
+# Sound effects, built once the mixer is up
+sounds = SoundBank()
+
+# Section timings for benchmarks and the profiler overlay; off by default.
+# F3 toggles profiling with the on-screen graph, F4 dumps a Chrome trace.
+profiler = FrameProfiler()
+profiler_overlay = ProfilerOverlay()
+
+# Scales particle effects and background layers to hold the frame budget;
+# only fed by the real-time loop, so headless runs always use full detail
+quality = QualityGovernor()
+
+# Structured debug events, off unless enabled with ASTEROIDBLITZ_LOG or F6
+log_projectile = gamelog.channel("projectile")
+log_projectile.limit(rate=500, burst=1000)
+
+# Pre-rendered rotations (and their masks) for the player ship and asteroids
+ROTATION_STEPS = 72  # 5 degree increments
+rotation_cache = RotationCache(ROTATION_STEPS, budget=32 * 1024 * 1024)
+
+# An enemy's movement, shoot and turn timers and aim live in the game's
+# enemy_controller, which ModernGame.update_enemies updates for all enemies
+# at once. The invulnerability after spawning runs out through the game's
+# scheduler.
+class Enemy(StoredSprite):
+    def __init__(self, x, y, game, profile="wander"):
+        super().__init__(game.enemy_controller)
+        self.game = game
+        self.profile = profile
+        size = ENEMY_PROFILES[profile]["size"]
+        key = "enemy" if size == 50 else ("enemy", size)
+
+        # Shared sprite image, scaled once by the asset cache
+        self.image = assets.image(key, ENEMY_IMAGE, (size, size))
         
         # Get the rectangle for positioning
         self.rect = self.image.get_rect(center=(x, y))
 
-        # Create a collision mask for pixel-perfect collisions
-        self.mask = pygame.mask.from_surface(self.image)
-        self.shoot_timer = 0
-        self.shoot_delay = 40
-        self.speed = 1
-        self.health = 50
-        self.direction = pygame.math.Vector2(0, 0)
-        self.change_direction_timer = 0
-        self.change_direction_delay = 120
-        self.invulnerable_timer = 60
-
-    def update(self, player=None):
-        if self.invulnerable_timer > 0:
-            self.invulnerable_timer -= 1
-    # Movement and shooting logic
-        if self.change_direction_timer <= 0:
-            self.direction = pygame.math.Vector2(random.uniform(-1, 1), random.uniform(-1, 1))
-            self.direction.normalize_ip()
-            self.change_direction_timer = self.change_direction_delay
-        else:
-            self.change_direction_timer -= 1
-
-        self.rect.x += self.direction.x * self.speed
-        self.rect.y += self.direction.y * self.speed
-
-        # Shooting logic
-        if player and self.shoot_timer <= 0:
-            self.shoot(player)
-            self.shoot_timer = self.shoot_delay
-        else:
-            self.shoot_timer -= 1
+        # Shared collision mask for pixel-perfect collisions
+        self.mask = assets.mask(key)
+        self.health = ENEMY_PROFILES[profile]["health"]
+        self.slot = self.store.add_enemy(self, x, y, profile)
+        self.vulnerable_event = None
+        self.invulnerable_timer = INVULNERABLE_FRAMES - STEP  # The tick it spawns on counts
 
+    # Frames of invulnerability left after this tick
+    @property
+    def invulnerable_timer(self):
+        return self.game.scheduler.remaining(self.vulnerable_event) * STEP
 
-    def shoot(self, player):
-        if player is None:
-            return  # Avoid errors if player is not passed
+    @invulnerable_timer.setter
+    def invulnerable_timer(self, frames):
+        self.game.scheduler.cancel(self.vulnerable_event)
+        self.vulnerable_event = self.game.scheduler.schedule(timer_ticks(frames), self.become_vulnerable) if frames > 0 else None
 
-        angle = math.degrees(math.atan2(
-            player.rect.centery - self.rect.centery,
-            player.rect.centerx - self.rect.centerx
-        ))
-        projectile = ModernProjectile(self.rect.centerx, self.rect.centery, angle, "normal")
-        game.all_sprites.add(projectile)
-        game.projectiles.add(projectile)
-        print("Projectile added:", projectile)  # Debug print to confirm addition
-        print("Current projectiles count:", len(game.projectiles))  
+    def become_vulnerable(self):
+        self.vulnerable_event = None
 
+    def kill(self):
+        if self.alive():
+            super().kill()
+            self.detach()
+            self.game.scheduler.cancel(self.vulnerable_event)
+            self.vulnerable_event = None
 
 
 class ModernPlayer(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, controls, scheduler):
         super().__init__()
+        self.controls = controls
+        self.scheduler = scheduler
         self.original_image = create_player_ship()
         self.image = self.original_image
         self.shield_image = create_shield_effect()
         self.rect = self.image.get_rect()
         self.rect.centerx = WIDTH // 2
         self.rect.bottom = HEIGHT - 100
+        # Rects only hold whole pixels, so the exact position is kept here
+        self.position = pygame.math.Vector2(self.rect.center)
         self.velocity = pygame.math.Vector2(0, 0)
         self.acceleration = 0.5
         self.max_speed = 8
@@ -194,38 +290,42 @@ class ModernPlayer(pygame.sprite.Sprite):
         self.shield = 100
         self.ammunition = 50
         self.shotgun_ammo = 6
-        self.invincibility_timer = 0
-        self.engine_particles = ParticleEffect(self.rect.centerx, self.rect.bottom, NEON_PINK)
+        self.invincibility_event = None
 
     def update(self):
         # Enhanced movement with acceleration
-        keys = pygame.key.get_pressed()
+        keys = self.controls.pressed()
+        acceleration = self.acceleration * STEP
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.velocity.x = max(self.velocity.x - self.acceleration, -self.max_speed)
+            self.velocity.x = max(self.velocity.x - acceleration, -self.max_speed)
         if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.velocity.x = min(self.velocity.x + self.acceleration, self.max_speed)
+            self.velocity.x = min(self.velocity.x + acceleration, self.max_speed)
         if keys[pygame.K_UP] or keys[pygame.K_w]:
-            self.velocity.y = max(self.velocity.y - self.acceleration, -self.max_speed)
+            self.velocity.y = max(self.velocity.y - acceleration, -self.max_speed)
         if keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            self.velocity.y = min(self.velocity.y + self.acceleration, self.max_speed)
+            self.velocity.y = min(self.velocity.y + acceleration, self.max_speed)
 
         # Apply velocity and friction
-        self.velocity *= self.friction
-        self.rect.x += self.velocity.x
-        self.rect.y += self.velocity.y
+        self.velocity *= self.friction ** STEP
+        self.position += self.velocity * STEP
+        self.rect.center = self.position
 
         # Screen boundaries with bounce effect
         if self.rect.left < 0:
             self.rect.left = 0
+            self.position.x = self.rect.centerx
             self.velocity.x *= -0.5
         if self.rect.right > WIDTH:
             self.rect.right = WIDTH
+            self.position.x = self.rect.centerx
             self.velocity.x *= -0.5
         if self.rect.top < 0:
             self.rect.top = 0
+            self.position.y = self.rect.centery
             self.velocity.y *= -0.5
         if self.rect.bottom > HEIGHT:
             self.rect.bottom = HEIGHT
+            self.position.y = self.rect.centery
             self.velocity.y *= -0.5
 
        # Rotation based on movement direction
@@ -233,155 +333,177 @@ class ModernPlayer(pygame.sprite.Sprite):
             self.angle = math.degrees(math.atan2(self.velocity.y, self.velocity.x))  # Correct order of arguments
 
         # Rotate the image based on the angle
-        self.image = pygame.transform.rotate(self.original_image, -self.angle)  # Negate the angle for correct rotation
+        self.image = rotation_cache.rotate(self.original_image, -self.angle)  # Negate the angle for correct rotation
         self.rect = self.image.get_rect(center=self.rect.center)
 
-        # Update engine particles
-        if abs(self.velocity.x) > 0.5 or abs(self.velocity.y) > 0.5:
-            self.engine_particles.x = self.rect.centerx
-            self.engine_particles.y = self.rect.bottom
-            self.engine_particles.create_particles(1)
-        self.engine_particles.update()
-
-        # Update invincibility
-        if self.invincibility_timer > 0:
-            self.invincibility_timer -= 1
-
-class ModernProjectile(pygame.sprite.Sprite):
-    def __init__(self, x, y, angle, projectile_type, is_player_projectile=False):
-        super().__init__()
+        # Emit engine particles
+        if (abs(self.velocity.x) > 0.5 or abs(self.velocity.y) > 0.5) and quality.every("engine", self.scheduler.now):
+            particle_system.emit(self.rect.centerx, self.rect.bottom, NEON_PINK)
+
+    # Frames of invincibility left after this tick
+    @property
+    def invincibility_timer(self):
+        return self.scheduler.remaining(self.invincibility_event) * STEP
+
+    @invincibility_timer.setter
+    def invincibility_timer(self, frames):
+        self.scheduler.cancel(self.invincibility_event)
+        self.invincibility_event = self.scheduler.schedule(timer_ticks(frames), self.end_invincibility) if frames > 0 else None
+
+    def end_invincibility(self):
+        self.invincibility_event = None
+
+    @property
+    def mask(self):
+        # Rotated masks come from the rotation cache and are only built when asked for
+        return rotation_cache.mask(self.original_image, -self.angle)
+
+# Size, color and speed per projectile type
+PROJECTILE_TYPES = {
+    "normal": ((8, 8), NEON_BLUE, 15),
+    "shotgun": ((12, 12), NEON_PINK, 12),
+}
+
+# Projectiles, asteroids and power-ups are recycled through pools: kill()
+# hands the sprite back to its pool and acquire() re-initializes it via reset()
+#
+# Projectile and asteroid motion lives in an EntityStore and is stepped for
+# all of them at once by ModernGame.update_projectiles / update_asteroids
+class ModernProjectile(StoredSprite):
+    def __init__(self, game, x, y, angle, projectile_type, is_player_projectile=False):
+        super().__init__(game.projectile_store)
+        self.game = game
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, y, angle, projectile_type, is_player_projectile)
+
+    def reset(self, x, y, angle, projectile_type, is_player_projectile=False):
         self.type = projectile_type
         self.is_player_projectile = is_player_projectile
+        self.size, self.color, self.speed = PROJECTILE_TYPES[self.type]
+        self.image = assets.surface(("projectile", self.type), draw_projectile, self.size, self.color)
+        self.mask = assets.mask(("projectile", self.type))
         
-        if self.type == "normal":
-            self.size = (8, 8)
-            self.color = NEON_BLUE
-            self.speed = 15
-        elif self.type == "shotgun":
-            self.size = (12, 12)
-            self.color = NEON_PINK
-            self.speed = 12
-
-
-
-        self.image = pygame.Surface(self.size, pygame.SRCALPHA)
-        pygame.draw.circle(self.image, self.color, 
-                         (self.size[0]//2, self.size[1]//2), 
-                         self.size[0]//2)
-        
-        self.rect = self.image.get_rect()
+        self.rect.size = self.image.get_size()
         self.rect.centerx = x
         self.rect.centery = y
         self.angle = math.radians(angle)
-        self.position = pygame.math.Vector2(x, y)
-        self.velocity = pygame.math.Vector2(
+        self.attach()
+        self.position = (x, y)
+        self.velocity = (
             self.speed * math.sin(self.angle),
             -self.speed * math.cos(self.angle)
         )
-        self.particles = ParticleEffect(x, y, self.color)
+        self.store.size[self.slot] = self.rect.size
+        self.store.tag[self.slot] = particle_system.color_id(self.color)  # Trail color
+        self.store.radius[self.slot] = self.size[0] / 2
+
+    def kill(self):
+        if self.alive():
+            super().kill()
+            self.detach()
+            self.game.projectile_pool.release(self)
+
+# Asteroid outlines come from a fixed bank of shapes per size, so pooled
+# asteroids and the rotation cache can share them
+ASTEROID_VARIANTS = 4
+ASTEROID_MIN_SIZE = 30  # Spawned sizes; splitting makes smaller ones
+ASTEROID_MAX_SIZE = 60
+
+def draw_asteroid(size, variant):
+    surface = pygame.Surface((size, size), pygame.SRCALPHA)
+    shape_rng = random.Random(size * ASTEROID_VARIANTS + variant)
+    
+    # Create a more detailed asteroid
+    points = []
+    num_points = 8
+    for i in range(num_points):
+        angle = 2 * math.pi * i / num_points
+        radius = size//2 * shape_rng.uniform(0.8, 1.2)
+        points.append((
+            size//2 + radius * math.cos(angle),
+            size//2 + radius * math.sin(angle)
+        ))
+    
+    pygame.draw.polygon(surface, NEON_GREEN, points)
+    pygame.draw.polygon(surface, WHITE, points, 2)
+    return surface
 
-    def update(self):
-        self.position += self.velocity
-        self.rect.center = self.position
-        print("Projectile position:", self.position) 
-        self.particles.x = self.rect.centerx
-        self.particles.y = self.rect.centery
-        self.particles.create_particles(1)
-        self.particles.update()
-        
-        if (self.rect.bottom < -50 or self.rect.top > HEIGHT + 50 or 
-            self.rect.right < -50 or self.rect.left > WIDTH + 50):
-            self.kill()
+class ModernAsteroid(StoredSprite):
+    def __init__(self, game, size, rng=random):
+        super().__init__(game.asteroid_store)
+        self.game = game
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(size, rng)
 
-class ModernAsteroid(pygame.sprite.Sprite):
-    def __init__(self, size):
-        super().__init__()
+    def reset(self, size, rng=random):
         self.size = size
-        self.image = pygame.Surface((size, size), pygame.SRCALPHA)
-        
-        # Create a more detailed asteroid
-        points = []
-        num_points = 8
-        for i in range(num_points):
-            angle = 2 * math.pi * i / num_points
-            radius = size//2 * random.uniform(0.8, 1.2)
-            points.append((
-                size//2 + radius * math.cos(angle),
-                size//2 + radius * math.sin(angle)
-            ))
-        
-        pygame.draw.polygon(self.image, NEON_GREEN, points)
-        pygame.draw.polygon(self.image, WHITE, points, 2)
+        self.variant = rng.randrange(ASTEROID_VARIANTS)
+        self.original_image = assets.surface(("asteroid", size, self.variant), draw_asteroid, size, self.variant)
+        self.image = self.original_image
         
-        self.rect = self.image.get_rect()
-        self.position = pygame.math.Vector2(0, 0)
-        self.velocity = pygame.math.Vector2(0, 0)
+        self.rect.size = self.image.get_size()
+        self.attach()
+        position = pygame.math.Vector2(0, 0)
+        velocity = pygame.math.Vector2(0, 0)
         self.rotation = 0
-        self.rotation_speed = random.uniform(-2, 2)
+        self.rotation_speed = rng.uniform(-2, 2)
         
         # Spawn position and velocity
-        if random.random() < 0.5:
+        if rng.random() < 0.5:
             # Spawn on sides
-            self.position.x = random.choice([-size, WIDTH + size])
-            self.position.y = random.randint(0, HEIGHT)
-            self.velocity.x = random.uniform(2, 4) * (-1 if self.position.x > WIDTH else 1)
-            self.velocity.y = random.uniform(-2, 2)
+            position.x = rng.choice([-size, WIDTH + size])
+            position.y = rng.randint(0, HEIGHT)
+            velocity.x = rng.uniform(2, 4) * (-1 if position.x > WIDTH else 1)
+            velocity.y = rng.uniform(-2, 2)
         else:
             # Spawn on top/bottom
-            self.position.x = random.randint(0, WIDTH)
-            self.position.y = random.choice([-size, HEIGHT + size])
-            self.velocity.x = random.uniform(-2, 2)
-            self.velocity.y = random.uniform(2, 4) * (-1 if self.position.y > HEIGHT else 1)
-        
-        self.rect.center = self.position
-
-    def update(self):
-        self.position += self.velocity
-        self.rotation += self.rotation_speed
-        
-        # Rotate the asteroid
-        rotated_image = pygame.transform.rotate(self.image, self.rotation)
-        self.rect = rotated_image.get_rect(center=self.position)
+            position.x = rng.randint(0, WIDTH)
+            position.y = rng.choice([-size, HEIGHT + size])
+            velocity.x = rng.uniform(-2, 2)
+            velocity.y = rng.uniform(2, 4) * (-1 if position.y > HEIGHT else 1)
         
-        # Remove if too far off screen
-        if (self.position.x < -100 or self.position.x > WIDTH + 100 or 
-            self.position.y < -100 or self.position.y > HEIGHT + 100):
-            self.kill()
+        self.position = position
+        self.velocity = velocity
+        self.store.radius[self.slot] = size / 2
+        self.rect.center = position
+
+    def kill(self):
+        if self.alive():
+            super().kill()
+            self.detach()
+            self.game.asteroid_pool.release(self)
+
+    @property
+    def mask(self):
+        return rotation_cache.mask(self.original_image, self.rotation)
+
+# Game and player attributes a snapshot carries over as they are
+SNAPSHOT_FIELDS = ("score", "level", "game_over", "enemy_spawn_timer", "enemy_spawn_delay", "boss_level")
+PLAYER_SNAPSHOT_FIELDS = ("angle", "health", "shield", "ammunition", "shotgun_ammo", "invincibility_timer")
+QUICKSAVE = "quicksave.abs"  # F5 saves here, F9 loads it back
 
 class ModernGame:
-    def __init__(self):
-        self.player = ModernPlayer()  # Ensure player is properly created
+    def __init__(self, seed=None, rng=None, controls=None, dirty_rendering=False, max_fps=0):
+        # Every gameplay random draw goes through self.rng, so a seed makes a run reproducible
+        if seed is None and rng is None:
+            seed = random.randrange(2 ** 32)  # Still known, so the run can be recorded
+        self.seed = seed
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.controls = controls if controls is not None else KeyboardControls()
+        if assets.atlas is None:
+            preload_sprites()
+        if not sounds.ready:
+            sounds.build()
         self.screen = screen
         self.clock = pygame.time.Clock()
         self.running = True
-        self.game_over = False
-        self.score = 0
-        self.level = 1
         # Background music
         self.background_music = "layers/Space Invaders - Space Invaders.mp3"
-        mixer.music.load(self.background_music)
-        self.background_stars = [
-            (random.randint(0, WIDTH), random.randint(0, HEIGHT)) 
-            for _ in range(100)
-        ]
-        self.star_speeds = [random.uniform(0.5, 2) for _ in range(100)]
-        self.background_layers = [
-            {"image": pygame.transform.scale(
-            pygame.image.load("layers/parallax-space-backgound.png").convert_alpha(), 
-            (WIDTH, HEIGHT)), "speed": 0.5, "x": 0},
-            # {"image": pygame.transform.scale(
-            #  pygame.image.load("layers/parallax-space-big-planet.png").convert_alpha(), 
-            # (WIDTH/2, HEIGHT/2)), "speed": 1, "x": 0},
-            # {"image": pygame.transform.scale(
-            # pygame.image.load("layers/parallax-space-far-planets.png").convert_alpha(), 
-            # (WIDTH, HEIGHT)), "speed": 1.5, "x": 0},
-            # {"image": pygame.transform.scale(
-            # pygame.image.load("layers/parallax-space-ring-planet.png").convert_alpha(), 
-            # (WIDTH/4, HEIGHT/4)), "speed": 2, "x": 0},
-            {"image": pygame.transform.scale(
-            pygame.image.load("layers/parallax-space-stars.png").convert_alpha(), 
-            (WIDTH, HEIGHT)), "speed": 2.5, "x": 0}
-        ]
+        mixer.music.load(assets.music(self.background_music))
+        self.background = ParallaxBackground((WIDTH, HEIGHT))
+        for index, (key, path, size, speed) in enumerate(BACKGROUND_LAYERS):
+            self.background.add_layer(assets.image(key, path, size, alpha=index > 0), speed)
+        self.background.build()
         # Start the background music
         mixer.music.set_volume(0.5)  # Adjust volume (0.0 to 1.0)
         mixer.music.play(-1)  # Loop the background music indefinitely
@@ -393,45 +515,300 @@ class ModernGame:
         self.power_ups = pygame.sprite.Group()  # Added this line
         self.enemies = pygame.sprite.Group()
 
+        # Entity rows and recycled sprites belong to this game alone, so
+        # several games (e.g. headless ones) can live in one process
+        self.projectile_store = EntityStore()
+        self.asteroid_store = EntityStore()
+        self.enemy_controller = EnemyController()
+        self.stores = (self.projectile_store, self.asteroid_store, self.enemy_controller)
+        self.projectile_pool = Pool(functools.partial(ModernProjectile, self))
+        self.asteroid_pool = Pool(functools.partial(ModernAsteroid, self))
+        self.power_up_pool = Pool(functools.partial(PowerUp, self))
+        self.pools = {"projectiles": self.projectile_pool, "asteroids": self.asteroid_pool,
+                      "power-ups": self.power_up_pool}
+        # Timed events (enemy spawns, invincibility and invulnerability
+        # running out), keyed on the simulation tick
+        self.scheduler = Scheduler()
+        
+        # HUD panels; widgets redraw only when their value changes
+        self.hud_left = (HudPanel((20, 20, 220, 110), text_cache)
+                         .bar("health", (0, 0, 200, 20), (60, 60, 60), NEON_BLUE)
+                         .bar("shield", (0, 25, 200, 10), (60, 60, 60), NEON_GREEN)
+                         .text("ammo", (0, 50), 36, WHITE, "Ammo: {}")
+                         .text("shotgun", (0, 80), 36, NEON_PINK, "Shotgun: {}"))
+        self.hud_right = (HudPanel((WIDTH - 150, 20, 150, 60), text_cache)
+                          .text("score", (0, 0), 36, WHITE, "Score: {}")
+                          .text("level", (0, 30), 36, WHITE, "Level: {}"))
+
+        # Collision broadphase, rebuilt once per frame after sprites move
+        self.broadphase = SpatialHash(cell_size=64)
+        self.pixel_perfect = False  # Mask narrowphase on top of the rect tests
+
+        # Balancing knobs, swept by farm.py
+        self.asteroid_base = 5  # Asteroids on screen at level 0; one more per level
+        self.projectile_damage = 25  # Per player projectile hitting an enemy
+        self.asteroid_damage = 1  # Damage to the player per pixel of asteroid size
+        self.enemy_projectile_damage = 10  # Per enemy projectile hitting the player
+        self.power_up_chance = 0.01  # Per 60 Hz frame
+
+        # Dirty-rectangle rendering: only regions that changed are redrawn and
+        # pushed to the display. The background then scrolls in steps every
+        # background_interval frames, which are the only full-screen updates.
+        self.dirty_rendering = dirty_rendering
+        self.background_interval = 4
+        self.background_frame = None  # The composed background, to erase from
+        self.dirty_rects = []  # Regions drawn last frame
+        self.frame_count = 0
+
+        # Rendering runs as fast as it can (or up to max_fps) and draws sprites
+        # interpolated between the last two simulation ticks
+        self.max_fps = max_fps
+        self.interpolation = False
+        self.present_seconds = 0.0  # Spent handing the last frame to the display
+        self.previous_centers = {}
+
+        self.spawn_event = None
+        self.reset()
+
+    # Start a new game on the assets, music and background already loaded.
+    # The RNG carries on, so a seeded session restarts reproducibly.
+    def reset(self):
+        self.clear_sprites()
+        self.game_over = False
+        self.score = 0
+        self.level = 1
+        self.background_stars = [
+            (self.rng.randint(0, WIDTH), self.rng.randint(0, HEIGHT)) 
+            for _ in range(100)
+        ]
+        self.star_speeds = [self.rng.uniform(0.5, 2) for _ in range(100)]
+
         # Create player
-        self.player = ModernPlayer()
+        self.player = ModernPlayer(self.controls, self.scheduler)
         self.all_sprites.add(self.player)
         
-        # Load fonts
-        self.title_font = pygame.font.Font(None, 74)
-        self.hud_font = pygame.font.Font(None, 36)
-        
-        # Particle systems
-        self.explosion_particles = []
+        # Particle system
+        particle_system.clear()
         
         # enemy spawning timer
         self.enemy_spawn_timer = 0
         self.enemy_spawn_delay = 120 # Delay in frames between enemy spawns
+        self.boss_level = 0  # Last level a boss was spawned on
+
+    # Frames until the next enemy spawns. It spawns on the tick after the
+    # timer has run down to 0, so 0 means the next tick.
+    @property
+    def enemy_spawn_timer(self):
+        return (self.scheduler.remaining(self.spawn_event) - 1) * STEP
+
+    @enemy_spawn_timer.setter
+    def enemy_spawn_timer(self, frames):
+        self.scheduler.cancel(self.spawn_event)
+        self.spawn_event = self.scheduler.schedule(timer_ticks(frames) + 1, self.spawn_due)
+
+    def spawn_due(self):
+        self.spawn_enemy()
+        self.enemy_spawn_timer = self.enemy_spawn_delay
+
+    # Hand every pooled sprite back, forget every entity row and every pending
+    # event, so nothing of the previous game is stepped (or draws random
+    # numbers) in the next
+    def clear_sprites(self):
+        for sprite in self.all_sprites.sprites():
+            sprite.kill()
+        for pool in self.pools.values():
+            pool.flush()
+        for store in self.stores:
+            store.clear()
+        self.scheduler.clear()
+        self.previous_centers = {}
+        self.dirty_rects = []
+        self.background_frame = None
+
+    # Everything the simulation depends on, as plain data that savestate.py
+    # can write out. Sprites are listed in draw order with what their pool or
+    # store row does not hold; particles are only decoration and left out.
+    def snapshot(self):
+        player = self.player
+        sprites = []
+        for sprite in self.all_sprites:
+            if sprite is player:
+                sprites.append(["player"])
+            elif isinstance(sprite, ModernAsteroid):
+                sprites.append(["asteroid", sprite.slot, sprite.size, sprite.variant, list(sprite.rect)])
+            elif isinstance(sprite, ModernProjectile):
+                sprites.append(["projectile", sprite.slot, sprite.type, sprite.is_player_projectile, sprite.angle,
+                                list(sprite.rect)])
+            elif isinstance(sprite, Enemy):
+                sprites.append(["enemy", sprite.slot, sprite.profile, sprite.health, list(sprite.rect),
+                                sprite.invulnerable_timer])
+            elif isinstance(sprite, PowerUp):
+                sprites.append(["power_up", sprite.type, list(sprite.rect), list(sprite.position)])
+        rng_version, rng_state, rng_gauss = self.rng.getstate()
+        return {
+            "seed": self.seed,
+            "rng": [rng_version, list(rng_state), rng_gauss],
+            **{name: getattr(self, name) for name in SNAPSHOT_FIELDS},
+            "player": {"rect": list(player.rect), "position": list(player.position), "velocity": list(player.velocity),
+                       **{name: getattr(player, name) for name in PLAYER_SNAPSHOT_FIELDS}},
+            "sprites": sprites,
+            "stores": [store.snapshot() for store in self.stores],
+            "background": [band.x for band in self.background.bands],
+        }
+
+    # Put the game back into a snapshot()'s state. Sprites come from the
+    # pools as usual and then take back their old store rows, so the run
+    # continues exactly as it would have from where the snapshot was taken.
+    def restore(self, state):
+        self.clear_sprites()
+        particle_system.clear()
+        self.seed = state["seed"]
+        rng_version, rng_state, rng_gauss = state["rng"]
+        self.rng.setstate((rng_version, tuple(rng_state), rng_gauss))
+        for name in SNAPSHOT_FIELDS:
+            setattr(self, name, state[name])
+
+        saved = state["player"]
+        self.player = player = ModernPlayer(self.controls, self.scheduler)
+        for name in PLAYER_SNAPSHOT_FIELDS:
+            setattr(player, name, saved[name])
+        player.velocity = pygame.math.Vector2(saved["velocity"])
+        player.image = rotation_cache.rotate(player.original_image, -player.angle)
+        player.rect = pygame.Rect(saved["rect"])
+        player.position = pygame.math.Vector2(saved.get("position", player.rect.center))
+
+        scratch = random.Random(0)  # Feeds reset(); the saved rows replace what it draws
+        stored = []
+        for kind, *fields in state["sprites"]:
+            if kind == "player":
+                self.all_sprites.add(player)
+                continue
+            if kind == "asteroid":
+                slot, size, variant, rect = fields
+                sprite = self.asteroid_pool.acquire(size, scratch)
+                sprite.variant = variant
+                sprite.original_image = assets.surface(("asteroid", size, variant), draw_asteroid, size, variant)
+                group = self.asteroids
+            elif kind == "projectile":
+                slot, projectile_type, is_player_projectile, angle, rect = fields
+                sprite = self.projectile_pool.acquire(0, 0, math.degrees(angle), projectile_type, is_player_projectile)
+                sprite.angle = angle
+                group = self.projectiles
+            elif kind == "enemy":
+                slot, profile, health, rect, *invulnerable = fields
+                sprite = Enemy(0, 0, self, profile)
+                sprite.health = health
+                sprite.invulnerable_timer = invulnerable[0] if invulnerable else 0
+                group = self.enemies
+            else:
+                slot = None
+                power_type, rect, *position = fields
+                sprite = self.power_up_pool.acquire(0, 0, power_type)
+                sprite.position = pygame.math.Vector2(position[0] if position else pygame.Rect(rect).center)
+                group = self.power_ups
+            sprite.rect.update(rect)
+            self.all_sprites.add(sprite)
+            group.add(sprite)
+            if slot is not None:
+                stored.append((sprite, slot))
+
+        for store, saved in zip(self.stores, state["stores"]):
+            store.restore(saved)
+        for sprite, slot in stored:
+            sprite.store.bind(sprite, slot)
+            if isinstance(sprite, ModernAsteroid):
+                frame = int(self.asteroid_store.frame[slot])
+                sprite.image = sprite.original_image if frame < 0 else rotation_cache.entry(sprite.original_image, frame)[0]
+        for band, x in zip(self.background.bands, state["background"]):
+            band.x = x
 
     def spawn_enemy(self):
         #spawn an enemy at a random position 
-        x = random.randint(0,WIDTH)
-        y = random.randint(0,HEIGHT // 2)
-        enemy = Enemy(x,y)
+        x = self.rng.randint(0,WIDTH)
+        y = self.rng.randint(0,HEIGHT // 2)
+        enemy = Enemy(x,y,self,self.enemy_profile())
         self.all_sprites.add(enemy)
         self.enemies.add(enemy)
 
-    def create_explosion(self, x, y, color):
-        particle_effect = ParticleEffect(x, y, color)
-        particle_effect.create_particles(20)
-        self.explosion_particles.append(particle_effect)
+    def enemy_profile(self):
+        # One boss on every fifth level, otherwise any profile unlocked so far
+        if boss_due(self.level, self.boss_level):
+            self.boss_level = self.level
+            return "boss"
+        profiles = unlocked_profiles(self.level)
+        return profiles[0] if len(profiles) == 1 else self.rng.choice(profiles)
+
+    def update_enemies(self):
+        slots, origins, angles = self.enemy_controller.update(self.player.rect.center, self.rng, STEP)
+        if not slots.size:
+            return
+        for sprite, position in zip(self.enemy_controller.sprites[slots].tolist(), self.enemy_controller.position[slots].tolist()):
+            sprite.rect.center = position
+
+        # Everything fired this tick is spawned in one batch
+        shots = [self.projectile_pool.acquire(x, y, angle, "normal")
+                 for (x, y), angle in zip(origins.tolist(), angles.tolist())]
+        if shots:
+            self.all_sprites.add(shots)
+            self.projectiles.add(shots)
+            sounds.play("shot")
+            if log_projectile.debug:
+                for shot in shots:
+                    log_projectile.event("spawned", source="enemy", x=shot.rect.centerx, y=shot.rect.centery,
+                                         angle=round(math.degrees(shot.angle), 1), live=len(self.projectiles))
+
+    def create_explosion(self, x, y, color, sound="explosion"):
+        particle_system.emit(x, y, color, quality.settings["explosion"])
+        sounds.play(sound)
         
     def update_particles(self):
-        surviving_particles = []
-        for particle_effect in self.explosion_particles:
-            particle_effect.update()
-            if particle_effect.particles:
-                surviving_particles.append(particle_effect)
-        self.explosion_particles = surviving_particles
+        particle_system.update(STEP)
+
+    def update_projectiles(self):
+        store = self.projectile_store
+        slots = store.step(STEP)
+        if not slots.size:
+            return
+        for sprite, position in zip(store.sprites[slots].tolist(), store.position[slots].tolist()):
+            sprite.rect.center = position
+        stride = quality.settings["trail"]
+        if stride:
+            # At lower detail a different subset of projectiles leaves a trail each tick
+            trail = slots if stride == 1 else slots[(slots + self.scheduler.now) % stride == 0]
+            particle_system.emit_points(store.centers(trail), store.tag[trail])
+
+        left, top, right, bottom = store.rects(slots)
+        offscreen = (bottom < -50) | (top > HEIGHT + 50) | (right < -50) | (left > WIDTH + 50)
+        for sprite in store.sprites[slots[offscreen]].tolist():
+            sprite.kill()
+            if log_projectile.debug:
+                log_projectile.event("killed", reason="offscreen", type=sprite.type, x=sprite.rect.centerx, y=sprite.rect.centery)
+
+    def update_asteroids(self):
+        store = self.asteroid_store
+        slots = store.step(STEP)
+        if not slots.size:
+            return
+        sprites = store.sprites[slots]
+
+        # Only asteroids that turned into the next rotation step get a new image
+        frames = rotation_cache.steps_for(store.rotation[slots])
+        turned = frames != store.frame[slots]
+        for sprite, frame in zip(sprites[turned].tolist(), frames[turned].tolist()):
+            sprite.image = rotation_cache.entry(sprite.original_image, frame)[0]
+            sprite.rect.size = sprite.image.get_size()
+        store.frame[slots] = frames
+        for sprite, position in zip(sprites.tolist(), store.position[slots].tolist()):
+            sprite.rect.center = position
+
+        # Remove if too far off screen
+        x, y = store.position[slots].T
+        offscreen = (x < -100) | (x > WIDTH + 100) | (y < -100) | (y > HEIGHT + 100)
+        for sprite in sprites[offscreen].tolist():
+            sprite.kill()
         
     def draw_particles(self):
-        for particle_effect in self.explosion_particles:
-            particle_effect.draw(self.screen)
+        particle_system.draw(self.screen)
             
     # def update_background(self):
     #     for i in range(len(self.background_stars)):
@@ -441,46 +818,25 @@ class ModernGame:
     #         )
             
     def draw_background(self):
-        screen.fill((0, 0, 0))  # Clear the screen with a black background
-        for layer in self.background_layers:
-            # Move the layer to the left by its speed
-            layer["x"] -= layer["speed"]
-
-            # Draw the layer twice to create a seamless scrolling effect
-            screen.blit(layer["image"], (layer["x"], 0))
-            screen.blit(layer["image"], (layer["x"] + layer["image"].get_width(), 0))
-
-            # Reset the layer position if it has moved completely off screen
-            if layer["x"] <= -layer["image"].get_width():
-                layer["x"] = 0
+        self.compose_background(self.screen)
+
+    def scroll_background(self, frames=1):
+        self.background.scroll(frames)
+
+    def compose_background(self, target):
+        self.background.draw(target, quality.settings["layers"])
                 
     def draw_hud(self):
-        # Health bar
-        health_width = 200
-        pygame.draw.rect(self.screen, (60, 60, 60), (20, 20, health_width, 20))
-        health_percent = max(0, self.player.health / 100)
-        pygame.draw.rect(self.screen, NEON_BLUE, 
-                        (20, 20, health_width * health_percent, 20))
-        
-        # Shield bar
-        pygame.draw.rect(self.screen, (60, 60, 60), (20, 45, health_width, 10))
-        shield_percent = max(0, self.player.shield / 100)
-        pygame.draw.rect(self.screen, NEON_GREEN,
-                        (20, 45, health_width * shield_percent, 10))
-        
-        # Ammo and score
-        ammo_text = self.hud_font.render(f'Ammo: {self.player.ammunition}', True, WHITE)
-        shotgun_text = self.hud_font.render(f'Shotgun: {self.player.shotgun_ammo}', True, NEON_PINK)
-        score_text = self.hud_font.render(f'Score: {self.score}', True, WHITE)
-        level_text = self.hud_font.render(f'Level: {self.level}', True, WHITE)
-        
-        self.screen.blit(ammo_text, (20, 70))
-        self.screen.blit(shotgun_text, (20, 100))
-        self.screen.blit(score_text, (WIDTH - 150, 20))
-        self.screen.blit(level_text, (WIDTH - 150, 50))
+        self.hud_left.set("health", max(0, self.player.health / 100))
+        self.hud_left.set("shield", max(0, self.player.shield / 100))
+        self.hud_left.set("ammo", self.player.ammunition)
+        self.hud_left.set("shotgun", self.player.shotgun_ammo)
+        self.hud_right.set("score", self.score)
+        self.hud_right.set("level", self.level)
+        return [self.hud_left.draw(self.screen), self.hud_right.draw(self.screen)]
         
     def handle_events(self):
-        for event in pygame.event.get():
+        for event in self.controls.events():
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
@@ -491,9 +847,13 @@ class ModernGame:
                     spawn_x = self.player.rect.centerx + (self.player.image.get_width() / 2) * math.cos(math.radians(self.player.angle))
                     spawn_y = self.player.rect.centery + (self.player.image.get_height() / 2) * math.sin(math.radians(self.player.angle))
                 
-                    projectile = ModernProjectile(spawn_x, spawn_y, self.player.angle, "normal", is_player_projectile=True)
+                    projectile = self.projectile_pool.acquire(spawn_x, spawn_y, self.player.angle, "normal", is_player_projectile=True)
                     self.all_sprites.add(projectile)
                     self.projectiles.add(projectile)
+                    sounds.play("shot")
+                    if log_projectile.debug:
+                        log_projectile.event("spawned", source="player", type="normal", x=round(spawn_x), y=round(spawn_y),
+                                             angle=round(self.player.angle, 1), live=len(self.projectiles))
                 elif event.key == pygame.K_q and self.player.shotgun_ammo >= 3:
                     self.player.shotgun_ammo -= 3
                     #if player.special_ammo
@@ -506,22 +866,51 @@ class ModernGame:
 
                     for spread in spreadAngles:
                         proj_angle = self.player.angle + spread
-                        projectile = ModernProjectile(spawn_x, spawn_y, proj_angle, "shotgun", is_player_projectile=True)
+                        projectile = self.projectile_pool.acquire(spawn_x, spawn_y, proj_angle, "shotgun", is_player_projectile=True)
                         self.all_sprites.add(projectile)
                         self.projectiles.add(projectile)
+                    sounds.play("shot")
+                    if log_projectile.debug:
+                        log_projectile.event("spawned", source="player", type="shotgun", x=round(spawn_x), y=round(spawn_y),
+                                             angle=round(self.player.angle, 1), live=len(self.projectiles))
 
                 elif event.key == pygame.K_r and self.game_over:
-                    self.__init__()
+                    self.reset()
+
+    # Profiler, logging and quick save/load keys. Only the interactive loop
+    # calls this, between ticks, so headless runs and replays never write
+    # traces or touch the quicksave.
+    def handle_tool_keys(self):
+        for key in self.controls.tool_keys():
+            if key == pygame.K_F3:
+                profiler_overlay.visible = not profiler_overlay.visible
+                profiler.enabled = profiler_overlay.visible
+            elif key == pygame.K_F4:
+                path = profiler.export_chrome_trace(time.strftime("trace-%Y%m%d-%H%M%S.json"))
+                print("Wrote profiler trace:", path)
+            elif key == pygame.K_F6:
+                log_projectile.set_level("warning" if log_projectile.debug else "debug")
+
+            elif key == pygame.K_F5:
+                print("Saved game to", savestate.save(QUICKSAVE, self.snapshot()))
+            elif key == pygame.K_F9 and os.path.exists(QUICKSAVE):
+                # A recording only holds input, so a replay could not follow the jump
+                if isinstance(self.controls, Recorder):
+                    print("Quick load is not available while recording")
+                    continue
+                self.restore(savestate.load(QUICKSAVE))
+                print("Loaded game from", QUICKSAVE)
 
     def spawn_power_up(self):
-        if random.random() < 0.01:  # 1% chance per frame
-            power_up = PowerUp(
-                random.randint(0, WIDTH),
+        if self.rng.random() < self.power_up_chance * STEP:
+            power_up = self.power_up_pool.acquire(
+                self.rng.randint(0, WIDTH),
                 -20,
-                random.choice(["ammo", "shield", "shotgun"])
+                self.rng.choice(["ammo", "shield", "shotgun"])
             )
             self.all_sprites.add(power_up)
             self.power_ups.add(power_up)
+            self.broadphase.insert(power_up)
 
     def update(self):
         if not self.game_over:
@@ -531,11 +920,8 @@ class ModernGame:
             # self.update_particles()
             # # self.update_background()
 
-            if self.enemy_spawn_timer <= 0:
-                self.spawn_enemy()
-                self.enemy_spawn_timer = self.enemy_spawn_delay # Reset the spawn timer
-            else:
-                self.enemy_spawn_timer -= 1
+            # Enemy spawns and anything else due this tick
+            self.scheduler.advance()
 
             # # In ModernGame update method
             # for enemy in self.enemies:
@@ -551,201 +937,435 @@ class ModernGame:
             #                     self.score += 10
 
             # Update all sprites and particles
-            self.enemies.update(self.player)
-            self.all_sprites.update()
-            self.update_particles()
-
-            # Only consider player projectiles in collisions with enemies
-            hits = pygame.sprite.groupcollide(self.projectiles, self.enemies, True, False)
-            
-            # Track enemies already hit this frame
-            hit_enemies = set()
-            
-            for projectile, enemies_hit in hits.items():
-                if not projectile.is_player_projectile:
-                    continue  # Skip non-player projectiles
-                
-                for enemy in enemies_hit:
-                    # Skip further processing if the enemy is invulnerable or already hit
-                    if enemy.invulnerable_timer > 0 or enemy in hit_enemies:
-                        continue
-                    
-                    # Apply damage and mark enemy as hit for this frame
-                    enemy.health -= 25  # Adjust damage as needed
-                    hit_enemies.add(enemy)
-                    
-                    # Check if enemy's health reaches zero
-                    if enemy.health <= 0:
-                        self.create_explosion(enemy.rect.centerx, enemy.rect.centery, NEON_GREEN)
-                        enemy.kill()
-                        self.score += 10
-            
+            with profiler.section("update_sprites"):
+                self.update_enemies()
+                self.player.update()
+                self.power_ups.update()
+                self.update_projectiles()
+                self.update_asteroids()
+            with profiler.section("update_particles"):
+                self.update_particles()
+
+            collided = pygame.sprite.collide_mask if self.pixel_perfect else None
+            with profiler.section("collisions"):
+                # Only the player's tests still go through the broadphase
+                self.broadphase.rebuild(self.asteroids, self.power_ups)
+                enemy_hits, asteroid_hits = self.projectile_hits()
+                self.check_enemy_hits(enemy_hits)
             
             # Spawn asteroids with increasing frequency and speed
-            if len(self.asteroids) < 5 + self.level:
-                size = random.randint(30, 60)
-                asteroid = ModernAsteroid(size)
+            if len(self.asteroids) < self.asteroid_base + self.level:
+                size = self.rng.randint(ASTEROID_MIN_SIZE, ASTEROID_MAX_SIZE)
+                asteroid = self.asteroid_pool.acquire(size, self.rng)
                 self.all_sprites.add(asteroid)
                 self.asteroids.add(asteroid)
+                self.broadphase.insert(asteroid)
             
             # Spawn power-ups
             self.spawn_power_up()
             
-            # Check projectile-asteroid collisions
-            hits = pygame.sprite.groupcollide(self.projectiles, self.asteroids, True, False)
-            for projectile, asteroids_hit in hits.items():
-                for asteroid in asteroids_hit:
-                    # Create explosion effect
-                    self.create_explosion(asteroid.rect.centerx, asteroid.rect.centery, NEON_GREEN)
-                    
-                    if projectile.type == "shotgun":
-                        # Special projectiles destroy asteroids immediately
+            with profiler.section("collisions"):
+                self.check_asteroid_hits(asteroid_hits)
+                self.check_player_hits(collided)
+                self.check_power_up_hits(collided)
+
+            # Sprites killed this frame become available again from next frame on
+            for pool in self.pools.values():
+                pool.flush()
+            for store in self.stores:
+                store.flush()
+
+    # Projectiles are tested along the whole path they flew this tick, so fast
+    # shots cannot skip over small asteroids. Each one hits the first enemy or
+    # asteroid it reaches; enemy projectiles fly through enemies, the one that
+    # fired them included, and only stop at asteroids. Returns
+    # {projectile: [enemy]} and {projectile: [asteroid]}.
+    def projectile_hits(self):
+        store = self.projectile_store
+        slots = store.live_slots()
+        player_slots = []
+        enemy_slots = []
+        for slot, projectile in zip(slots.tolist(), store.sprites[slots].tolist()):
+            (player_slots if projectile.is_player_projectile else enemy_slots).append(slot)
+        enemy_hits = {}
+        asteroid_hits = {}
+        for projectile, target in swept_hits(store, (self.enemy_controller, self.asteroid_store), player_slots):
+            (enemy_hits if target.store is self.enemy_controller else asteroid_hits)[projectile] = [target]
+        for projectile, target in swept_hits(store, (self.asteroid_store,), enemy_slots):
+            asteroid_hits[projectile] = [target]
+        return enemy_hits, asteroid_hits
+
+    def check_enemy_hits(self, hits):
+        # Only player projectiles reach enemies (see projectile_hits)
+        for projectile in hits:
+            projectile.kill()
+        if log_projectile.debug:
+            for projectile, enemies_hit in hits.items():
+                log_projectile.event("hit", target="enemy", type=projectile.type, player=projectile.is_player_projectile,
+                                     x=projectile.rect.centerx, y=projectile.rect.centery, targets=len(enemies_hit))
+        
+        # Track enemies already hit this frame
+        hit_enemies = set()
+        
+        for projectile, enemies_hit in hits.items():
+            for enemy in enemies_hit:
+                # Skip further processing if the enemy is invulnerable or already hit
+                if enemy.invulnerable_timer > 0 or enemy in hit_enemies:
+                    continue
+                
+                # Apply damage and mark enemy as hit for this frame
+                enemy.health -= self.projectile_damage
+                hit_enemies.add(enemy)
+                
+                # Check if enemy's health reaches zero
+                if enemy.health <= 0:
+                    self.create_explosion(enemy.rect.centerx, enemy.rect.centery, NEON_GREEN)
+                    enemy.kill()
+                    self.score += 10
+                else:
+                    sounds.play("hit")
+
+    def check_asteroid_hits(self, hits):
+        # Check projectile-asteroid collisions
+        for projectile, asteroids_hit in hits.items():
+            projectile.kill()
+            if log_projectile.debug:
+                log_projectile.event("hit", target="asteroid", type=projectile.type, player=projectile.is_player_projectile,
+                                     x=projectile.rect.centerx, y=projectile.rect.centery, targets=len(asteroids_hit))
+            for asteroid in asteroids_hit:
+                # Create explosion effect
+                self.create_explosion(asteroid.rect.centerx, asteroid.rect.centery, NEON_GREEN)
+                
+                if projectile.type == "shotgun":
+                    # Special projectiles destroy asteroids immediately
+                    asteroid.kill()
+                    self.score += 50
+                else:
+                    # Normal projectiles split larger asteroids
+                    if asteroid.size > 30:
+                        # Split into two smaller asteroids
+                        for _ in range(2):
+                            new_size = asteroid.size // 2
+                            new_asteroid = self.asteroid_pool.acquire(new_size, self.rng)
+                            new_asteroid.position = asteroid.rect.center
+                            new_asteroid.velocity = asteroid.velocity.rotate(self.rng.uniform(-45, 45))
+                            self.all_sprites.add(new_asteroid)
+                            self.asteroids.add(new_asteroid)
+                            self.broadphase.insert(new_asteroid)
                         asteroid.kill()
-                        self.score += 50
                     else:
-                        # Normal projectiles split larger asteroids
-                        if asteroid.size > 30:
-                            # Split into two smaller asteroids
-                            for _ in range(2):
-                                new_size = asteroid.size // 2
-                                new_asteroid = ModernAsteroid(new_size)
-                                new_asteroid.position = pygame.math.Vector2(asteroid.rect.center)
-                                new_asteroid.velocity = asteroid.velocity.rotate(random.uniform(-45, 45))
-                                self.all_sprites.add(new_asteroid)
-                                self.asteroids.add(new_asteroid)
-                            asteroid.kill()
-                        else:
-                            asteroid.kill()
-                        self.score += 10
-                    
-                    if self.score % 1000 == 0:
-                        self.level += 1
-                        # Reward player with special ammo on level up
-                        self.player.shotgun_ammo = min(self.player.shotgun_ammo + 3, 6)
-            
-            # Check player-asteroid collisions
-            if self.player.invincibility_timer == 0:
-                hits = pygame.sprite.spritecollide(self.player, self.asteroids, True)
-                if hits:
-                    for asteroid in hits:
-                        # Shield takes damage first
-                        remaining_damage = asteroid.size
-                        if self.player.shield > 0:
-                            shield_damage = min(self.player.shield, remaining_damage)
-                            self.player.shield -= shield_damage
-                            remaining_damage -= shield_damage
-                        
-                        # Any remaining damage affects health
-                        if remaining_damage > 0:
-                            self.player.health -= remaining_damage
-                        
-                        # Create explosion effect
-                        self.create_explosion(asteroid.rect.centerx, asteroid.rect.centery, NEON_PINK)
-                        
-                    self.player.invincibility_timer = 60
-                    
-                    if self.player.health <= 0:
-                        self.game_over = True
-                        self.create_explosion(self.player.rect.centerx, self.player.rect.centery, NEON_BLUE)
-            
-            # Check power-up collisions
-            power_up_hits = pygame.sprite.spritecollide(self.player, self.power_ups, True)
-            for power_up in power_up_hits:
-                if power_up.type == "ammo":
-                    self.player.ammunition = min(self.player.ammunition + 20, 100)
-                elif power_up.type == "shield":
-                    self.player.shield = min(self.player.shield + 50, 100)
-                elif power_up.type == "shotgun":
-                    self.player.shotgun_ammo = min(self.player.shotgun_ammo + 3, 6)
+                        asteroid.kill()
+                    self.score += 10
                 
-                # Create collection effect
-                self.create_explosion(power_up.rect.centerx, power_up.rect.centery, NEON_BLUE)
-
-    def draw(self):
-        self.draw_background()
-        self.draw_particles()
-        
-        for projectile in self.projectiles:
-            self.screen.blit(projectile.image, projectile.rect)
-            print("Projectile drawn at:", projectile.rect.topleft)
+                if self.score % 1000 == 0:
+                    self.level += 1
+                    # Reward player with special ammo on level up
+                    self.player.shotgun_ammo = min(self.player.shotgun_ammo + 3, 6)
 
-        # Draw engine particles
-        self.player.engine_particles.draw(self.screen)
+    def check_player_hits(self, collided):
+        # Check player-asteroid and player-enemy projectile collisions
+        if self.player.invincibility_timer <= 0:
+            hits = self.broadphase.spritecollide(self.player, self.asteroids, True, collided)
+            for asteroid in hits:
+                self.damage_player(asteroid.size * self.asteroid_damage)
+                self.create_explosion(asteroid.rect.centerx, asteroid.rect.centery, NEON_PINK, "hit")
+
+            shots = [projectile for projectile in pygame.sprite.spritecollide(self.player, self.projectiles, False, collided)
+                     if not projectile.is_player_projectile]
+            for projectile in shots:
+                projectile.kill()
+                if log_projectile.debug:
+                    log_projectile.event("hit", target="player", type=projectile.type, player=False,
+                                         x=projectile.rect.centerx, y=projectile.rect.centery, targets=1)
+                self.damage_player(self.enemy_projectile_damage)
+                self.create_explosion(projectile.rect.centerx, projectile.rect.centery, NEON_PINK, "hit")
+
+            if hits or shots:
+                self.player.invincibility_timer = 60
+                
+                if self.player.health <= 0:
+                    self.game_over = True
+                    self.create_explosion(self.player.rect.centerx, self.player.rect.centery, NEON_BLUE)
+
+    def damage_player(self, damage):
+        # Shield takes damage first
+        if self.player.shield > 0:
+            shield_damage = min(self.player.shield, damage)
+            self.player.shield -= shield_damage
+            damage -= shield_damage
         
-        # Draw all sprites
-        self.all_sprites.draw(self.screen)
+        # Any remaining damage affects health
+        if damage > 0:
+            self.player.health -= damage
+
+    def check_power_up_hits(self, collided):
+        # Check power-up collisions
+        power_up_hits = self.broadphase.spritecollide(self.player, self.power_ups, True, collided)
+        for power_up in power_up_hits:
+            if power_up.type == "ammo":
+                self.player.ammunition = min(self.player.ammunition + 20, 100)
+            elif power_up.type == "shield":
+                self.player.shield = min(self.player.shield + 50, 100)
+            elif power_up.type == "shotgun":
+                self.player.shotgun_ammo = min(self.player.shotgun_ammo + 3, 6)
+            
+            # Create collection effect
+            self.create_explosion(power_up.rect.centerx, power_up.rect.centery, NEON_BLUE, "power_up")
+
+    # `alpha` is how far real time has got from the last simulation tick
+    # towards the next one, between 0 and 1
+    def draw(self, alpha=1.0):
+        moved = self.interpolate_sprites(alpha) if self.interpolation and alpha < 1 else []
+        if self.dirty_rendering:
+            self.draw_dirty()
+        else:
+            self.draw_full()
+        for sprite, center in moved:
+            sprite.rect.center = center
+
+    # Move sprites to where they would be `alpha` of the way from the previous
+    # tick to the current one; returns what draw() has to put back
+    def interpolate_sprites(self, alpha):
+        moved = []
+        for sprite, (previous_x, previous_y) in self.previous_centers.items():
+            if not sprite.alive():
+                continue
+            x, y = center = sprite.rect.center
+            if x != previous_x or y != previous_y:
+                moved.append((sprite, center))
+                sprite.rect.center = (previous_x + (x - previous_x) * alpha, previous_y + (y - previous_y) * alpha)
+        return moved
+
+    def draw_full(self):
+        with profiler.section("draw_background"):
+            self.draw_background()
+        with profiler.section("draw_particles"):
+            self.draw_particles()
         
-        # Draw projectile particles
-        for sprite in self.projectiles:
-            sprite.particles.draw(self.screen)
+        with profiler.section("draw_sprites"):
+            # Draw all sprites (projectiles included)
+            self.all_sprites.draw(self.screen)
         
+        self.draw_foreground()
+        self.present()
+
+    def draw_dirty(self):
+        self.frame_count += 1
+        full_frame = self.background_frame is None or self.frame_count % self.background_interval == 0
+        with profiler.section("draw_background"):
+            if full_frame:
+                if self.background_frame is None:
+                    self.background_frame = pygame.Surface(self.screen.get_size()).convert()
+                self.compose_background(self.background_frame)
+                self.screen.blit(self.background_frame, (0, 0))
+            else:
+                # Erase what was drawn last frame
+                for rect in self.dirty_rects:
+                    self.screen.blit(self.background_frame, rect, rect)
+
+        with profiler.section("draw_particles"):
+            self.draw_particles()
+            rects = particle_system.dirty_rects()
+        with profiler.section("draw_sprites"):
+            self.all_sprites.draw(self.screen)
+            rects.extend(sprite.rect.copy() for sprite in self.all_sprites)
+        rects.extend(self.draw_foreground())
+
+        screen_rect = self.screen.get_rect()
+        rects = [rect.clip(screen_rect) for rect in rects]
+        self.present(None if full_frame else self.dirty_rects + rects)
+        self.dirty_rects = rects
+
+    # Show the frame, all of it or just `rects`. With vsync this blocks until
+    # the display refreshes, which is waiting rather than work, so the quality
+    # governor leaves it out.
+    def present(self, rects=None):
+        start = time.perf_counter()
+        with profiler.section("present"):
+            if rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
+        self.present_seconds = time.perf_counter() - start
+
+    # HUD, game-over text and profiler overlay; returns the regions drawn
+    def draw_foreground(self):
         # Draw HUD
-        self.draw_hud()
-        
-        if self.game_over:
-            game_over_text = self.title_font.render('GAME OVER', True, NEON_PINK)
-            score_text = self.hud_font.render(f'Final Score: {self.score}', True, WHITE)
-            restart_text = self.hud_font.render('Press R to Restart', True, WHITE)
+        with profiler.section("draw_hud"):
+            rects = self.draw_hud()
             
-            self.screen.blit(game_over_text, 
-                           (WIDTH//2 - game_over_text.get_width()//2, 
-                            HEIGHT//2 - game_over_text.get_height()))
-            self.screen.blit(score_text,
-                           (WIDTH//2 - score_text.get_width()//2,
-                            HEIGHT//2 + 20))
-            self.screen.blit(restart_text,
-                           (WIDTH//2 - restart_text.get_width()//2,
-                            HEIGHT//2 + 60))
+            if self.game_over:
+                game_over_text = text_cache.render('GAME OVER', 74, NEON_PINK)
+                score_text = text_cache.render(f'Final Score: {self.score}', 36, WHITE)
+                restart_text = text_cache.render('Press R to Restart', 36, WHITE)
+                
+                rects.append(self.screen.blit(game_over_text, 
+                               (WIDTH//2 - game_over_text.get_width()//2, 
+                                HEIGHT//2 - game_over_text.get_height())))
+                rects.append(self.screen.blit(score_text,
+                               (WIDTH//2 - score_text.get_width()//2,
+                                HEIGHT//2 + 20)))
+                rects.append(self.screen.blit(restart_text,
+                               (WIDTH//2 - restart_text.get_width()//2,
+                                HEIGHT//2 + 60)))
         
-        pygame.display.flip()
+        if profiler_overlay.visible:
+            rects.append(profiler_overlay.draw(self.screen, profiler, self.entity_counts()))
+        return rects
+
+    def entity_counts(self):
+        return {
+            "asteroids": len(self.asteroids),
+            "projectiles": len(self.projectiles),
+            "enemies": len(self.enemies),
+            "power-ups": len(self.power_ups),
+            "particles": particle_system.count(),
+            "scheduled events": "{} / fired {}".format(self.scheduler.depth(), self.scheduler.fired),
+            "quality": "{} / changed {}x".format(quality.name, quality.changes),
+            **{f"pooled {name}": "{in_use} / peak {high_water}".format(**pool.stats())
+               for name, pool in self.pools.items()},
+        }
 
     
     
-    def run(self):
-        while self.running:
-            self.clock.tick(60)  # Limit to 60 frames per second
+    # One simulation tick: input, then game state. Nothing here waits on the
+    # clock, so headless runs can call it as fast as the CPU allows.
+    def step(self):
+        if self.interpolation:
+            self.previous_centers = {sprite: sprite.rect.center for sprite in self.all_sprites}
+        sounds.begin_tick()
+
+        with profiler.section("handle_events"):
             self.handle_events()  # Handle user input
-            
-            if not self.game_over:
+        
+        if not self.game_over:
+            with profiler.section("update"):
                 self.update()  # Update game state
+        self.scroll_background(STEP)
+        self.controls.after_step(self)
+
+    # Fixed-timestep loop: the simulation advances in SIM_RATE ticks per
+    # second of real time, however fast frames are drawn. After a stall at
+    # most MAX_CATCH_UP ticks are run and the rest of the backlog is dropped,
+    # so the game slows down instead of never catching up.
+    def run(self):
+        self.interpolation = True
+        tick_seconds = 1 / SIM_RATE
+        quality.budget = 1 / (self.max_fps or 60)
+        lag = 0.0
+        previous = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            lag += now - previous
+            previous = now
+
+            profiler.begin_frame()
+            ticks = 0
+            while lag >= tick_seconds and self.running:
+                if ticks == MAX_CATCH_UP:
+                    lag %= tick_seconds
+                    break
+                self.step()
+                lag -= tick_seconds
+                ticks += 1
+            self.handle_tool_keys()
             
-            self.draw()  # Render the game
+            with profiler.section("draw"):
+                self.draw(lag / tick_seconds)  # Render the game
+            profiler.end_frame()
+            quality.frame(time.perf_counter() - now - self.present_seconds)
+            self.clock.tick(self.max_fps)  # 0 leaves the frame rate uncapped
             
             # Check for pause key
-            keys = pygame.key.get_pressed()
+            keys = self.controls.pressed()
             if keys[pygame.K_p]:  # Use the 'P' key to pause the game
                 show_pause_menu(self.screen)
+                previous = time.perf_counter()  # Time spent paused is not simulated
 
+        print(assets.report())
+        gamelog.stop()
         pygame.quit()  # Clean up and exit
 
 # Power-up class definition
+POWER_UP_COLORS = {
+    "ammo": NEON_BLUE,
+    "shield": NEON_GREEN,
+    "shotgun": NEON_PINK,
+}
+
 class PowerUp(pygame.sprite.Sprite):
-    def __init__(self, x, y, power_type):
+    def __init__(self, game, x, y, power_type):
         super().__init__()
+        self.game = game
+        self.reset(x, y, power_type)
+
+    def reset(self, x, y, power_type):
         self.type = power_type
-        self.image = pygame.Surface((20, 20), pygame.SRCALPHA)
-        
-        if self.type == "ammo":
-            self.image.fill(NEON_BLUE)
-        elif self.type == "shield":
-            self.image.fill(NEON_GREEN)
-        elif self.type == "shotgun":
-            self.image.fill(NEON_PINK)
+        self.image = assets.surface(("power_up", self.type), draw_power_up, POWER_UP_COLORS[self.type])
+        self.mask = assets.mask(("power_up", self.type))
         
         self.rect = self.image.get_rect(center=(x, y))
+        self.position = pygame.math.Vector2(x, y)
         self.velocity = 2
 
     def update(self):
-        self.rect.y += self.velocity
+        self.position.y += self.velocity * STEP
+        self.rect.center = self.position
         if self.rect.top > HEIGHT:
             self.kill()
 
+    def kill(self):
+        if self.alive():
+            super().kill()
+            self.game.power_up_pool.release(self)
+
+
 
 
             
 # Start the game
 if __name__ == "__main__":
-    # Show start menu before starting the game
+    parser = argparse.ArgumentParser(description="Modern Asteroid Blitz")
+    parser.add_argument("--dirty", action="store_true", help="redraw only changed screen regions")
+    parser.add_argument("--sim-rate", type=sim_rate_arg, default=SIM_RATE, help="simulation ticks per second")
+    parser.add_argument("--fps", type=int, default=0, help="frame rate cap (default: uncapped)")
+    parser.add_argument("--vsync", action="store_true", help="sync frames to the display refresh")
+    parser.add_argument("--quality", choices=["auto"] + [level["name"] for level in QUALITY_LEVELS], default="auto",
+                        help="effect detail; auto lowers it while frames run over budget")
+    parser.add_argument("--record", metavar="PATH", help="record the session for replay.py")
+    parser.add_argument("--seed", type=seed_arg, help="seed for the game's random numbers")
+    parser.add_argument("--asset-cache", action="store_true",
+                        help=f"keep decoded, scaled images in {ASSET_CACHE_DIR} for faster starts")
+    # Opt-in, as a bundle is not rebuilt when files under layers/ change
+    parser.add_argument("--bundle", nargs="?", const=BUNDLE_PATH, metavar="PATH",
+                        help=f"read assets from a bundle built by bundle.py (default: {BUNDLE_PATH})")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    set_sim_rate(args.sim_rate)
+    if args.quality != "auto":
+        quality.fix(args.quality)
+    gamelog.configure()
+    init_display(vsync=args.vsync)
+    if args.bundle:
+        assets.open_bundle(args.bundle)
+    if args.asset_cache:
+        assets.cache_dir = ASSET_CACHE_DIR
+    # Images decode in the background while the start menu waits for a key
+    prefetch_assets()
+    menu_shown = time.perf_counter()
     show_start_menu(screen)
-    game = ModernGame()  # Create an instance of the game
-    game.run()  # Start the game loop
\ No newline at end of file
+    menu_closed = time.perf_counter()
+    controls = KeyboardControls()
+    if args.record:
+        controls = Recorder(controls)
+    game = ModernGame(seed=args.seed, controls=controls,
+                      dirty_rendering=args.dirty, max_fps=args.fps)  # Create an instance of the game
+    print(f"Startup: start menu after {(menu_shown - started) * 1000:.0f} ms, "
+          f"game ready {(time.perf_counter() - menu_closed) * 1000:.0f} ms after it closed")
+    try:
+        game.run()  # Start the game loop
+    finally:
+        # Also when the window is closed from the pause menu, which exits directly
+        if args.record:
+            print(f"Recorded {controls.tick + 1} ticks to {controls.save(args.record, SIM_RATE)}")
\ No newline at end of file
@@ -0,0 +1,130 @@
+import numpy as np
+import pygame
+
+ALPHA_BUCKETS = 16
+MAX_PARTICLE_SIZE = 8
+
+
+# One particle system shared by the whole game. Every particle lives in a set
+# of fixed-size NumPy columns that are integrated and culled in bulk, and new
+# particles are written into a ring buffer: once the buffer is full the oldest
+# particles get overwritten instead of any list growing.
+class ParticleSystem:
+    def __init__(self, capacity=65536, seed=None):
+        self.capacity = capacity
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.int16)
+        self.size = np.zeros(capacity, dtype=np.uint8)
+        self.color = np.zeros(capacity, dtype=np.uint8)  # Index into self.palette
+        self.palette = []
+        self.palette_ids = {}
+        self.sprites = np.empty(0, dtype=object)  # Indexed by sprite_key()
+        self.head = 0  # Next slot to write
+        self.age = 0.0  # Fraction of a frame not yet taken off lifetimes
+        self.used = 0  # Slots written at least once; only these get scanned
+        # Particles have their own RNG so they never disturb gameplay randomness
+        self.rng = np.random.default_rng(seed)
+
+    def color_id(self, color):
+        color = tuple(color)
+        if color not in self.palette_ids:
+            self.palette_ids[color] = len(self.palette)
+            self.palette.append(color)
+            self.sprites = np.concatenate([self.sprites, bake_sprites(color)])
+        return self.palette_ids[color]
+
+    def emit(self, x, y, color, amount=1):
+        amount = min(amount, self.capacity)
+        if amount <= 0:
+            return
+        slots = (self.head + np.arange(amount)) % self.capacity
+        self.position[slots] = (x, y)
+        self.velocity[slots] = self.rng.uniform(-2, 2, (amount, 2))
+        self.lifetime[slots] = self.rng.integers(20, 41, amount)
+        self.size[slots] = self.rng.integers(2, 5, amount)
+        self.color[slots] = self.color_id(color)
+        self.head = (self.head + amount) % self.capacity
+        self.used = min(self.capacity, self.used + amount)
+
+    # One particle at each of `points` (an (n, 2) array), colored by palette id
+    def emit_points(self, points, color_ids):
+        amount = min(len(points), self.capacity)
+        if amount <= 0:
+            return
+        slots = (self.head + np.arange(amount)) % self.capacity
+        self.position[slots] = points[:amount]
+        self.velocity[slots] = self.rng.uniform(-2, 2, (amount, 2))
+        self.lifetime[slots] = self.rng.integers(20, 41, amount)
+        self.size[slots] = self.rng.integers(2, 5, amount)
+        self.color[slots] = color_ids[:amount]
+        self.head = (self.head + amount) % self.capacity
+        self.used = min(self.capacity, self.used + amount)
+
+    # `step` is in 60 Hz frames; lifetimes count down in whole frames
+    def update(self, step=1.0):
+        used = self.used
+        lifetime = self.lifetime[:used]
+        if step == 1.0:
+            self.position[:used] += self.velocity[:used]
+        else:
+            self.position[:used] += self.velocity[:used] * step
+        self.age += step
+        frames = int(self.age)
+        self.age -= frames
+        if frames:
+            lifetime -= frames
+            np.maximum(lifetime, 0, out=lifetime)
+
+    def alive(self):
+        return np.flatnonzero(self.lifetime[:self.used])
+
+    def count(self):
+        return int(np.count_nonzero(self.lifetime[:self.used]))
+
+    def clear(self):
+        self.lifetime[:] = 0
+        self.head = 0
+        self.used = 0
+
+    def dirty_rects(self, cell=32):
+        # Screen regions covering every live particle, one per occupied grid cell
+        alive = self.alive()
+        if not alive.size:
+            return []
+        cells = (self.position[alive] // cell).astype(np.int32)
+        keys = np.unique(cells[:, 0].astype(np.int64) * 65536 + (cells[:, 1] + 32768))
+        columns, rows = np.divmod(keys, 65536)
+        return [pygame.Rect(x * cell, (y - 32768) * cell, cell + MAX_PARTICLE_SIZE, cell + MAX_PARTICLE_SIZE)
+                for x, y in zip(columns.tolist(), rows.tolist())]
+
+    def draw(self, surface):
+        alive = self.alive()
+        if not alive.size:
+            return
+        # Pick a pre-baked sprite per particle and hand everything to one blits() call
+        alpha = np.minimum(self.lifetime[alive].astype(np.int32) * 6, 255)
+        keys = sprite_key(self.color[alive].astype(np.int32), self.size[alive], alpha)
+        position = self.position[alive].astype(np.int32)
+        surface.blits(list(zip(self.sprites[keys].tolist(),
+                               zip(position[:, 0].tolist(), position[:, 1].tolist()))),
+                      doreturn=False)
+
+
+def sprite_key(color_id, size, alpha):
+    return (color_id * MAX_PARTICLE_SIZE + size) * ALPHA_BUCKETS + alpha * ALPHA_BUCKETS // 256
+
+
+# Square sprites for one color at every size and alpha bucket, in sprite_key() order
+def bake_sprites(color):
+    sprites = np.empty(MAX_PARTICLE_SIZE * ALPHA_BUCKETS, dtype=object)
+    convert = pygame.display.get_surface() is not None
+    for size in range(MAX_PARTICLE_SIZE):
+        for bucket in range(ALPHA_BUCKETS):
+            sprite = pygame.Surface((max(size, 1), max(size, 1)))
+            if convert:
+                sprite = sprite.convert()
+            sprite.fill(color)
+            sprite.set_alpha((bucket * 256 + 128) // ALPHA_BUCKETS)
+            sprites[sprite_key(0, size, bucket * 256 // ALPHA_BUCKETS)] = sprite
+    return sprites
@@ -0,0 +1,45 @@
+# Free-list object pool. acquire() hands back a recycled object re-initialized
+# through its reset() method, or builds a new one with `factory` when the
+# pool is empty. Released objects are parked until flush() (once per frame),
+# so code still holding one later in the same frame never sees it come back
+# as something else.
+class Pool:
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.released = []
+        self.in_use = 0
+        self.high_water = 0
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            item = self.free.pop()
+            item.reset(*args, **kwargs)
+            self.reused += 1
+        else:
+            item = self.factory(*args, **kwargs)
+            self.created += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return item
+
+    def release(self, item):
+        self.released.append(item)
+        self.in_use = max(0, self.in_use - 1)
+
+    def flush(self):
+        if self.released:
+            self.free.extend(self.released)
+            self.released.clear()
+
+    def stats(self):
+        return {
+            "in_use": self.in_use,
+            "free": len(self.free) + len(self.released),
+            "high_water": self.high_water,
+            "created": self.created,
+            "reused": self.reused,
+        }
@@ -0,0 +1,177 @@
+import json
+import time
+from collections import deque
+
+import pygame
+
+
+# Per-section frame timing. Wrap work in `with profiler.section(name):`;
+# times for a section entered several times in one frame are added up.
+# While disabled, section() hands back a shared no-op context manager, so
+# instrumented code costs one method call per section.
+#
+# The raw (name, start, end, depth) events of the last `trace_frames` frames
+# are kept too, for export as a Chrome trace / Perfetto JSON file.
+class FrameProfiler:
+    def __init__(self, history=600, trace_frames=300):
+        self.enabled = False
+        self.frames = deque(maxlen=history)  # One {section: ms} dict per frame
+        self.traces = deque(maxlen=trace_frames)  # One (start, end, events) per frame
+        self.current = {}
+        self.events = []
+        self.frame_start = 0.0
+        self.depth = 0
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        return Section(self, name)
+
+    def begin_frame(self):
+        self.current = {}
+        self.events = []
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self.enabled:
+            end = time.perf_counter()
+            self.current["frame"] = (end - self.frame_start) * 1000
+            self.frames.append(self.current)
+            self.traces.append((self.frame_start, end, self.events))
+        self.current = {}
+        self.events = []
+
+    def record(self, name, start, end, depth):
+        self.current[name] = self.current.get(name, 0.0) + (end - start) * 1000
+        self.events.append((name, start, end, depth))
+
+    def clear(self):
+        self.frames.clear()
+        self.traces.clear()
+        self.current = {}
+        self.events = []
+
+    def chrome_trace(self):
+        if not self.traces:
+            return {"traceEvents": [], "displayTimeUnit": "ms"}
+        origin = self.traces[0][0]
+        events = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "Modern Asteroid Blitz"}}]
+        for number, (start, end, sections) in enumerate(self.traces):
+            events.append(trace_event(f"frame {number}", start, end, origin))
+            for name, section_start, section_end, _ in sections:
+                events.append(trace_event(name, section_start, section_end, origin))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w") as out:
+            json.dump(self.chrome_trace(), out)
+        return path
+
+
+class Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.depth += 1
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler.depth -= 1
+        self.profiler.record(self.name, self.start, end, self.profiler.depth)
+
+
+class NullSection:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_SECTION = NullSection()
+
+
+def trace_event(name, start, end, origin):
+    return {"name": name, "ph": "X", "pid": 1, "tid": 1,
+            "ts": round((start - origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+
+
+# Live frame-time graph: one stacked bar per recent frame, one color per
+# section, with a 60 FPS budget line, a legend and the current entity counts.
+# draw() returns the screen region it covered.
+class ProfilerOverlay:
+    SECTIONS = [
+        ("handle_events", (200, 200, 200)),
+        ("update_sprites", (0, 219, 255)),
+        ("update_particles", (255, 16, 240)),
+        ("collisions", (255, 80, 80)),
+        ("draw_background", (90, 90, 255)),
+        ("draw_particles", (255, 140, 220)),
+        ("draw_sprites", (57, 255, 20)),
+        ("draw_hud", (255, 255, 0)),
+        ("present", (255, 160, 0)),
+    ]
+    OTHER_COLOR = (110, 110, 110)
+
+    def __init__(self, width=480, height=120, frames=240, budget_ms=1000 / 60):
+        self.visible = False
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.budget_ms = budget_ms
+        self.font = None
+        self.panel = None
+
+    def draw(self, surface, profiler, counts):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+            self.panel = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            self.panel.fill((0, 0, 0, 170))
+        left = surface.get_width() - self.width - 10
+        top = surface.get_height() - self.height - 10
+        surface.blit(self.panel, (left, top))
+
+        scale = self.height / (self.budget_ms * 2)  # Graph tops out at twice the budget
+        frames = list(profiler.frames)[-self.frames:]
+        bar_width = max(1, self.width // self.frames)
+        bottom = top + self.height
+        for index, frame in enumerate(frames):
+            x = left + index * bar_width
+            y = bottom
+            stacked = 0.0
+            for name, color in self.SECTIONS:
+                ms = frame.get(name, 0.0)
+                if ms:
+                    height = ms * scale
+                    pygame.draw.rect(surface, color, (x, y - height, bar_width, height))
+                    y -= height
+                    stacked += ms
+            other = frame.get("frame", stacked) - stacked
+            if other > 0:
+                pygame.draw.rect(surface, self.OTHER_COLOR, (x, y - other * scale, bar_width, other * scale))
+        budget_y = bottom - self.budget_ms * scale
+        pygame.draw.line(surface, (255, 255, 255), (left, budget_y), (left + self.width, budget_y))
+
+        latest = frames[-1] if frames else {}
+        lines = [f"frame {latest.get('frame', 0.0):5.2f} ms"]
+        lines += [f"{name} {latest.get(name, 0.0):5.2f}" for name, _ in self.SECTIONS]
+        lines += [f"{name}: {count}" for name, count in counts.items()]
+        text_top = y = top - 14 * len(lines) - 4
+        for line, color in zip(lines, [(255, 255, 255)] + [color for _, color in self.SECTIONS]
+                               + [(255, 255, 255)] * len(counts)):
+            surface.blit(self.font.render(line, True, color), (left, y))
+            y += 14
+        return pygame.Rect(left, text_top, self.width, top + self.height - text_top)
+
+
+def percentiles(values, points=(50, 95, 99)):
+    if not values:
+        return {f"p{point}": 0.0 for point in points}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {f"p{point}": round(ordered[min(last, round(last * point / 100))], 4) for point in points}
@@ -0,0 +1,76 @@
+from collections import deque
+
+# Detail levels for everything that is only decoration, best first. Strides
+# mean "every Nth" (projectiles for trails, ticks for engine exhaust) and 0
+# turns the effect off; layers is how many parallax bands are drawn, None
+# for all of them.
+QUALITY_LEVELS = [
+    {"name": "high", "trail": 1, "explosion": 20, "engine": 1, "layers": None},
+    {"name": "medium", "trail": 2, "explosion": 12, "engine": 2, "layers": None},
+    {"name": "low", "trail": 4, "explosion": 8, "engine": 4, "layers": 1},
+    {"name": "minimal", "trail": 0, "explosion": 4, "engine": 0, "layers": 1},
+]
+
+
+# Holds a frame-time budget by stepping the detail level down while recent
+# frames cost more than the budget and back up once they have left plenty of
+# headroom for a while. The two thresholds, the longer wait before raising
+# and starting a fresh window after every change keep it from flipping back
+# and forth between two levels.
+#
+# Only particles and background layers are scaled. Particles have their own
+# RNG, so nothing here can change how a seeded game plays out.
+class QualityGovernor:
+    def __init__(self, levels=QUALITY_LEVELS, budget=1 / 60, window=30, raise_below=0.6, raise_after=120):
+        self.levels = levels
+        self.budget = budget  # Seconds of update and draw work per frame
+        self.samples = deque(maxlen=window)
+        self.raise_below = raise_below  # Fraction of the budget counted as headroom
+        self.raise_after = raise_after  # Frames of headroom before raising
+        self.headroom = 0
+        self.level = 0
+        self.enabled = True
+        self.changes = 0
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    @property
+    def name(self):
+        return self.settings["name"]
+
+    # Pin a level by name and stop adapting, e.g. from the command line
+    def fix(self, name):
+        self.level = next(index for index, level in enumerate(self.levels) if level["name"] == name)
+        self.enabled = False
+
+    # Whether a per-tick effect with a stride setting runs on this tick
+    def every(self, key, tick):
+        stride = self.settings[key]
+        return stride > 0 and tick % stride == 0
+
+    # Work time of one rendered frame, without waiting for the display
+    def frame(self, seconds):
+        if not self.enabled:
+            return
+        self.samples.append(seconds)
+        if len(self.samples) < self.samples.maxlen:
+            return
+        average = sum(self.samples) / len(self.samples)
+        if average > self.budget:
+            self.headroom = 0
+            if self.level < len(self.levels) - 1:
+                self.change(self.level + 1)
+        elif average < self.budget * self.raise_below:
+            self.headroom += 1
+            if self.headroom >= self.raise_after and self.level > 0:
+                self.change(self.level - 1)
+        else:
+            self.headroom = 0
+
+    def change(self, level):
+        self.level = level
+        self.samples.clear()
+        self.headroom = 0
+        self.changes += 1
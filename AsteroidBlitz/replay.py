@@ -0,0 +1,207 @@
+# Session recording and replay. A recording is the game's seed plus, per
+# tick, the held movement keys as a bitmask, the keys pressed that tick and a
+# hash of the resulting game state. Replaying feeds the same input into a
+# headless game and checks every tick's hash, so a desync is caught on the
+# tick it happens.
+#
+#     python main.py --record session.abr
+#     python replay.py session.abr
+import argparse
+import struct
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+from controls import HeldKeys
+
+MAGIC = b"ABR1"
+HEADER = struct.Struct("<4sQHI")  # magic, seed, simulation rate, ticks
+
+# Keys the game polls as held down; the bit index is the position here
+KEYS = (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d, pygame.K_UP, pygame.K_w,
+        pygame.K_DOWN, pygame.K_s, pygame.K_p)
+QUIT = 0  # Recorded in place of a key for a window close
+MAX_SEED = 2 ** 64  # Seeds are stored unsigned in the header
+
+
+# argparse type for --seed, so a seed the header cannot hold is refused
+# before a session is played rather than when it is saved
+def seed_arg(text):
+    seed = int(text)
+    if not 0 <= seed < MAX_SEED:
+        raise argparse.ArgumentTypeError(f"seed must be between 0 and 2**64 - 1, got {seed}")
+    return seed
+
+
+def held_keys(mask):
+    return HeldKeys(key for bit, key in enumerate(KEYS) if mask >> bit & 1)
+
+
+def state_hash(game):
+    player = game.player
+    values = [game.score, game.level, game.game_over, player.health, player.shield, player.ammunition,
+              player.shotgun_ammo, player.invincibility_timer, *player.rect, player.velocity.x, player.velocity.y,
+              hash(game.rng.getstate()[1])]  # The int tuple; hash(None) differs between processes
+    for group in (game.asteroids, game.enemies, game.projectiles, game.power_ups):
+        values.append(len(group))
+        for sprite in group:
+            values.extend(sprite.rect)
+    return zlib.crc32(repr(values).encode())
+
+
+class Replay:
+    def __init__(self, seed, sim_rate, masks, counts, presses, hashes):
+        self.seed = seed
+        self.sim_rate = sim_rate
+        self.masks = np.asarray(masks, dtype="<u2")
+        self.counts = np.asarray(counts, dtype="<u1")
+        self.presses = np.asarray(presses, dtype="<u4")
+        self.hashes = np.asarray(hashes, dtype="<u4")
+        self.starts = np.concatenate([[0], np.cumsum(self.counts, dtype=np.int64)])
+
+    @property
+    def ticks(self):
+        return len(self.masks)
+
+    def presses_at(self, tick):
+        return self.presses[self.starts[tick]:self.starts[tick + 1]].tolist()
+
+    def save(self, path):
+        body = b"".join(column.tobytes() for column in (self.masks, self.counts, self.presses, self.hashes))
+        with open(path, "wb") as out:
+            out.write(HEADER.pack(MAGIC, self.seed, self.sim_rate, self.ticks))
+            out.write(zlib.compress(body, 9))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as source:
+            magic, seed, sim_rate, ticks = HEADER.unpack(source.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an Asteroid Blitz recording")
+            body = zlib.decompress(source.read())
+        masks = np.frombuffer(body, "<u2", ticks)
+        offset = masks.nbytes
+        counts = np.frombuffer(body, "<u1", ticks, offset)
+        offset += counts.nbytes
+        presses = np.frombuffer(body, "<u4", int(counts.sum(dtype=np.int64)), offset)
+        offset += presses.nbytes
+        hashes = np.frombuffer(body, "<u4", ticks, offset)
+        return cls(seed, sim_rate, masks, counts, presses, hashes)
+
+
+# Wraps the real controls and records what the game sees. Held keys are
+# sampled once per tick, when the events are read, so the recording and the
+# live game agree on them.
+class Recorder:
+    def __init__(self, controls):
+        self.controls = controls
+        self.tick = -1
+        self.seed = None
+        self.held = HeldKeys()
+        self.masks = []
+        self.counts = []
+        self.presses = []
+        self.hashes = []
+
+    def events(self):
+        self.tick += 1
+        events = self.controls.events()
+        pressed = self.controls.pressed()
+        mask = 0
+        for bit, key in enumerate(KEYS):
+            if pressed[key]:
+                mask |= 1 << bit
+        self.held = held_keys(mask)
+        codes = [QUIT if event.type == pygame.QUIT else event.key
+                 for event in events if event.type in (pygame.QUIT, pygame.KEYDOWN)]
+        self.masks.append(mask)
+        self.counts.append(len(codes))
+        self.presses.extend(codes)
+        return events
+
+    def pressed(self):
+        return self.held
+
+    # Tool keys never reach events(), so none of them is recorded
+    def tool_keys(self):
+        return self.controls.tool_keys()
+
+    def after_step(self, game):
+        if self.seed is None:
+            if game.seed is not None and not 0 <= game.seed < MAX_SEED:
+                raise ValueError(f"seed {game.seed} cannot be recorded, it must be between 0 and 2**64 - 1")
+            self.seed = game.seed
+        self.hashes.append(state_hash(game))
+
+    def replay(self, sim_rate=60):
+        return Replay(self.seed if self.seed is not None else 0, sim_rate, self.masks, self.counts, self.presses, self.hashes)
+
+    def save(self, path, sim_rate=60):
+        return self.replay(sim_rate).save(path)
+
+
+# Plays a recording back as input and checks each tick's state hash
+class ReplayControls:
+    def __init__(self, replay):
+        self.replay = replay
+        self.tick = -1
+        self.held = HeldKeys()
+        self.mismatch = None  # First tick whose state differed
+
+    def events(self):
+        self.tick += 1
+        if self.tick >= self.replay.ticks:
+            return []
+        self.held = held_keys(int(self.replay.masks[self.tick]))
+        return [pygame.event.Event(pygame.QUIT) if code == QUIT else pygame.event.Event(pygame.KEYDOWN, key=code)
+                for code in self.replay.presses_at(self.tick)]
+
+    def pressed(self):
+        return self.held
+
+    def tool_keys(self):
+        return []
+
+    def after_step(self, game):
+        if (self.mismatch is None and self.tick < self.replay.ticks
+                and state_hash(game) != self.replay.hashes[self.tick]):
+            self.mismatch = self.tick
+
+
+def verify(replay, draw=False):
+    import main  # Not at the top: main imports this module
+    main.set_sim_rate(replay.sim_rate)
+    if main.screen is None:
+        main.init_display(headless=True)
+    controls = ReplayControls(replay)
+    game = main.ModernGame(seed=replay.seed, controls=controls)
+    for _ in range(replay.ticks):
+        game.step()
+        if draw:
+            game.draw()
+        if controls.mismatch is not None:
+            break
+    return game, controls.mismatch
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay and verify a recorded session headless")
+    parser.add_argument("path")
+    parser.add_argument("--draw", action="store_true", help="also render every tick")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    start = time.perf_counter()
+    game, mismatch = verify(replay, args.draw)
+    elapsed = time.perf_counter() - start
+    ticks = game.controls.tick + 1
+    print(f"seed {replay.seed}, {replay.ticks} ticks at {replay.sim_rate} Hz "
+          f"({replay.ticks / replay.sim_rate / 60:.1f} min), {ticks} replayed in {elapsed:.2f}s")
+    if mismatch is None:
+        print("OK: every tick matched")
+    else:
+        print(f"DESYNC at tick {mismatch}")
+        raise SystemExit(1)
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+
+# Rotated copies of source surfaces at a fixed number of quantized angles.
+# Entries are rendered the first time an angle is asked for (or up front via
+# prerender) and evicted least-recently-used first once the cache holds more
+# than `budget` bytes.
+# Masks of the rotated images live in the same entries, so they are built at
+# most once per angle and evicted together.
+class RotationCache:
+    def __init__(self, steps=72, budget=32 * 1024 * 1024):
+        self.steps = steps
+        self.budget = budget
+        self.entries = OrderedDict()  # (surface, step) -> [image, mask, bytes]
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def step(self, angle):
+        return round(angle * self.steps / 360) % self.steps
+
+    # step() for a whole array of angles at once
+    def steps_for(self, angles):
+        return np.round(angles * self.steps / 360).astype(np.int64) % self.steps
+
+    def rotate(self, surface, angle):
+        return self.entry(surface, self.step(angle))[0]
+
+    def mask(self, surface, angle):
+        entry = self.entry(surface, self.step(angle))
+        if entry[1] is None:
+            entry[1] = pygame.mask.from_surface(entry[0])
+            width, height = entry[0].get_size()
+            mask_bytes = (width * height + 7) // 8
+            entry[2] += mask_bytes
+            self.bytes += mask_bytes
+            self.trim()
+        return entry[1]
+
+    # Render every angle of `surface` ahead of use. Stops early, returning
+    # False, once the cache holds `limit` bytes (default: the budget), so
+    # preloading never evicts anything.
+    def prerender(self, surface, limit=None):
+        limit = self.budget if limit is None else limit
+        for step in range(self.steps):
+            if self.bytes >= limit:
+                return False
+            self.entry(surface, step)
+        return True
+
+    def entry(self, surface, step):
+        key = (surface, step)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        image = pygame.transform.rotate(surface, step * 360 / self.steps)
+        image_bytes = image.get_width() * image.get_height() * image.get_bytesize()
+        entry = self.entries[key] = [image, None, image_bytes]
+        self.bytes += image_bytes
+        self.trim()
+        return entry
+
+    def trim(self):
+        # Never evict the entry that was just used
+        while self.bytes > self.budget and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.bytes -= entry[2]
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,36 @@
+# Save states: a ModernGame.snapshot() written as zlib-compressed JSON behind
+# a small header. JSON keeps every float exact (repr round-trips), and loading
+# a file never runs code the way unpickling would.
+#
+#     state = game.snapshot()
+#     savestate.save("quicksave.abs", state)
+#     game.restore(savestate.load("quicksave.abs"))
+import json
+import struct
+import zlib
+
+MAGIC = b"ABS1"
+HEADER = struct.Struct("<4sI")  # magic, uncompressed size
+
+
+def dumps(state):
+    body = json.dumps(state, separators=(",", ":")).encode()
+    return HEADER.pack(MAGIC, len(body)) + zlib.compress(body, 6)
+
+
+def loads(data):
+    magic, _ = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not an Asteroid Blitz save state")
+    return json.loads(zlib.decompress(data[HEADER.size:]))
+
+
+def save(path, state):
+    with open(path, "wb") as out:
+        out.write(dumps(state))
+    return path
+
+
+def load(path):
+    with open(path, "rb") as source:
+        return loads(source.read())
@@ -0,0 +1,60 @@
+import heapq
+import itertools
+
+
+# Events keyed on the simulation tick. Instead of counting a timer down on
+# every tick, a sprite or the game schedules a callback for the tick it is
+# due on; advance() then only does work for events that are actually due.
+# Events due on the same tick run in the order they were scheduled.
+#
+# Cancelled events stay in the heap, marked dead, until their tick comes up
+# (the usual heapq pattern), so cancelling is O(1).
+class Scheduler:
+    def __init__(self):
+        self.now = 0
+        self.queue = []
+        self.order = itertools.count()
+        self.pending = 0  # Live events in the queue
+        self.fired = 0
+
+    # Returns the event, for cancel() and remaining()
+    def schedule(self, ticks, callback, *args):
+        event = [self.now + ticks, next(self.order), callback, args]
+        heapq.heappush(self.queue, event)
+        self.pending += 1
+        return event
+
+    def cancel(self, event):
+        if event is not None and event[2] is not None:
+            event[2] = None
+            self.pending -= 1
+
+    # Ticks until the event fires; 0 once it has fired or been cancelled
+    def remaining(self, event):
+        if event is None or event[2] is None:
+            return 0
+        return event[0] - self.now
+
+    # Move to the next tick and run everything due on it
+    def advance(self):
+        self.now += 1
+        queue = self.queue
+        while queue and queue[0][0] <= self.now:
+            event = heapq.heappop(queue)
+            callback = event[2]
+            if callback is None:
+                continue
+            event[2] = None
+            self.pending -= 1
+            self.fired += 1
+            callback(*event[3])
+
+    def clear(self):
+        for event in self.queue:
+            event[2] = None
+        self.queue.clear()
+        self.pending = 0
+        self.now = 0
+
+    def depth(self):
+        return self.pending
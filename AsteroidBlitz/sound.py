@@ -0,0 +1,110 @@
+import numpy as np
+from pygame import mixer
+
+# Sound effects. Every effect is synthesized once into a mixer.Sound when
+# the bank is built, so playing one never decodes anything. Each category
+# gets its own reserved channels and a cap on plays per tick: a projectile
+# storm makes at most `per_tick` play calls, and once every channel of a
+# category is busy the voice that started first is cut off for the new one.
+#
+# name -> channels, plays per tick, volume
+CATEGORIES = {
+    "shot": (4, 2, 0.25),
+    "hit": (3, 2, 0.4),
+    "explosion": (4, 2, 0.5),
+    "power_up": (1, 1, 0.5),
+}
+
+
+def tone(seconds, rate, start_hz, end_hz, decay):
+    t = np.arange(int(seconds * rate)) / rate
+    frequency = np.linspace(start_hz, end_hz, t.size)
+    phase = 2 * np.pi * np.cumsum(frequency) / rate
+    return np.sin(phase) * np.exp(-decay * t)
+
+
+def noise(seconds, rate, decay, smoothing, seed):
+    t = np.arange(int(seconds * rate)) / rate
+    samples = np.random.default_rng(seed).uniform(-1, 1, t.size)
+    if smoothing > 1:
+        # Moving average as a cheap low-pass, for a duller rumble
+        samples = np.convolve(samples, np.ones(smoothing) / smoothing, mode="same") * np.sqrt(smoothing)
+    return np.clip(samples, -1, 1) * np.exp(-decay * t)
+
+
+# Waveforms in [-1, 1] for each category
+def synthesize(rate):
+    return {
+        "shot": tone(0.08, rate, 1400, 500, 30),
+        "hit": 0.6 * noise(0.06, rate, 45, 2, seed=1) + 0.4 * tone(0.06, rate, 300, 150, 45),
+        "explosion": noise(0.45, rate, 8, 12, seed=2),
+        "power_up": tone(0.18, rate, 500, 1200, 6),
+    }
+
+
+class SoundBank:
+    def __init__(self, categories=CATEGORIES):
+        self.categories = categories
+        self.sounds = {}
+        self.channels = {}
+        self.started = {}  # Channel -> tick its current sound started on
+        self.played_this_tick = {}
+        self.tick = 0
+        self.enabled = True
+        self.played = self.dropped = self.stolen = 0
+
+    @property
+    def ready(self):
+        return bool(self.sounds)
+
+    # Needs an initialized mixer; without one the bank stays silent
+    def build(self):
+        init = mixer.get_init()
+        if init is None:
+            return self
+        rate, size, output_channels = init
+        if abs(size) != 16:
+            return self
+        reserved = sum(count for count, _, _ in self.categories.values())
+        mixer.set_num_channels(max(mixer.get_num_channels(), reserved))
+        mixer.set_reserved(reserved)  # Keep Sound.play() off these
+        first = 0
+        for name, (count, _, _) in self.categories.items():
+            self.channels[name] = [mixer.Channel(index) for index in range(first, first + count)]
+            first += count
+
+        for name, wave in synthesize(rate).items():
+            samples = (wave * 32767 * 0.8).astype(np.int16)
+            if output_channels > 1:
+                samples = np.repeat(samples[:, None], output_channels, axis=1)
+            sound = mixer.Sound(buffer=samples.tobytes())
+            sound.set_volume(self.categories[name][2])
+            self.sounds[name] = sound
+        return self
+
+    def begin_tick(self):
+        self.tick += 1
+        self.played_this_tick.clear()
+
+    def play(self, name):
+        if not self.enabled or not self.sounds:
+            return False
+        count = self.played_this_tick.get(name, 0)
+        if count >= self.categories[name][1]:
+            self.dropped += 1
+            return False
+        self.played_this_tick[name] = count + 1
+
+        channels = self.channels[name]
+        channel = next((channel for channel in channels if not channel.get_busy()), None)
+        if channel is None:
+            # Steal the voice that has been playing the longest
+            channel = min(channels, key=lambda channel: self.started.get(channel, 0))
+            self.stolen += 1
+        channel.play(self.sounds[name])
+        self.started[channel] = self.tick
+        self.played += 1
+        return True
+
+    def stats(self):
+        return {"played": self.played, "dropped": self.dropped, "stolen": self.stolen}